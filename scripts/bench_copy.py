@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for SupabaseTicketCopier.copy_tickets against local fake
+Supabase projects (see fake_postgrest.py).
+
+For every combination of table size, batch size, insert workers and fetch
+workers, a fresh staging table is created and copy_tickets runs in its own
+process, so peak memory is measured per run. Reports throughput, p50/p95/p99
+client request latency and peak RSS, optionally as JSON for comparing runs.
+
+Usage:
+    python scripts/bench_copy.py
+    python scripts/bench_copy.py --sizes 10000 100000 --batch-sizes 100 500 --workers 1 4 8 --stream
+    python scripts/bench_copy.py --latency 0.02 --rate-limit-rate 0.05 --json bench.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import itertools
+import multiprocessing
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgrest
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_case(case: Dict[str, Any], source_url: str, staging_url: str, results) -> None:
+    """Run one copy in a child process and report its measurements."""
+    import resource
+    from copy_pyro_tickets_supabase import SupabaseTicketCopier
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    copier = SupabaseTicketCopier(source_url, 'bench-source-key', staging_url, 'bench-staging-key',
+                                  staging_service_key='bench-service-key')
+    copier.batch_size = case['batch_size']
+    copier.workers = case['workers']
+    copier.fetch_workers = case['fetch_workers']
+    copier.page_size = case['page_size']
+    copier.retry_delay = case['retry_delay']
+    copier.upsert = case['upsert']
+    copier.adaptive_batching = case['adaptive']
+
+    latencies: Dict[str, List[float]] = {'GET': [], 'POST': []}
+    make_request = copier._make_request
+
+    def timed_request(url, api_key, method='GET', *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return make_request(url, api_key, method, *args, **kwargs)
+        finally:
+            latencies[method.upper()].append(time.perf_counter() - started)
+
+    copier._make_request = timed_request
+
+    started = time.perf_counter()
+    try:
+        result = copier.copy_tickets(None, check_missing=case['check_missing'], stream=case['stream'])
+    finally:
+        copier.close()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = sorted(latencies['GET'] + latencies['POST'])
+    results.put({
+        'elapsed': elapsed,
+        'inserted_count': result.get('inserted_count', 0),
+        'source_count': result.get('source_count', 0),
+        'requests': {method: len(values) for method, values in latencies.items()},
+        'p50_ms': percentile(all_latencies, 50) * 1000,
+        'p95_ms': percentile(all_latencies, 95) * 1000,
+        'p99_ms': percentile(all_latencies, 99) * 1000,
+        'post_p50_ms': percentile(sorted(latencies['POST']), 50) * 1000,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'stages': copier.metrics.to_dict()['stages'],
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark copy_tickets against local fake Supabase projects')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help='Source table sizes')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 500], help='Insert batch sizes')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='Concurrent insert workers')
+    parser.add_argument('--fetch-workers', type=int, nargs='+', default=[1], help='Concurrent source id-range readers')
+    parser.add_argument('--page-size', type=int, default=1000, help='Source page size')
+    parser.add_argument('--stream', action='store_true', help='Use the streaming pipeline')
+    parser.add_argument('--check-missing', action='store_true', help='Copy through the --check-missing ID diff path')
+    parser.add_argument('--upsert', choices=['merge', 'ignore'], help='Insert in upsert mode')
+    parser.add_argument('--adaptive-batches', action='store_true', help='Use adaptive batch sizing')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency of up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with a 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with injected 429s')
+    parser.add_argument('--retry-delay', type=float, default=0.1, help='Copier base retry delay in seconds')
+    parser.add_argument('--json', metavar='PATH', help='Also write results as JSON to PATH')
+
+    args = parser.parse_args()
+
+    from bench_transform import synthetic_ticket
+
+    faults = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                  rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=1)
+    source = FakePostgrest(**faults).start()
+    staging = FakePostgrest(**faults).start()
+    staging_table = staging.table('support_ticket')
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    header = (f"{'rows':>9} {'batch':>6} {'wrk':>4} {'fwrk':>4} {'secs':>8} {'rows/s':>10} "
+              f"{'GET':>6} {'POST':>7} {'p50ms':>7} {'p95ms':>7} {'p99ms':>8} {'rssMB':>7}")
+    print(header)
+    print('-' * len(header))
+
+    try:
+        for size in args.sizes:
+            rng = random.Random(42)
+            source.table('support_ticket').load([synthetic_ticket(i, rng) for i in range(1, size + 1)])
+
+            for batch_size, workers, fetch_workers in itertools.product(args.batch_sizes, args.workers, args.fetch_workers):
+                staging_table.clear()
+                case = {
+                    'size': size,
+                    'batch_size': batch_size,
+                    'workers': workers,
+                    'fetch_workers': fetch_workers,
+                    'page_size': args.page_size,
+                    'stream': args.stream,
+                    'check_missing': args.check_missing,
+                    'upsert': args.upsert,
+                    'adaptive': args.adaptive_batches,
+                    'retry_delay': args.retry_delay,
+                }
+
+                queue = context.Queue()
+                process = context.Process(target=run_case, args=(case, source.url, staging.url, queue))
+                process.start()
+                measured = queue.get()
+                process.join()
+
+                row = {**case, **measured, 'rows_per_sec': measured['inserted_count'] / measured['elapsed'],
+                       'staging_rows': len(staging_table.rows)}
+                results.append(row)
+                print(f"{size:>9} {batch_size:>6} {workers:>4} {fetch_workers:>4} {row['elapsed']:>8.2f} "
+                      f"{row['rows_per_sec']:>10,.0f} {row['requests']['GET']:>6} {row['requests']['POST']:>7} "
+                      f"{row['p50_ms']:>7.1f} {row['p95_ms']:>7.1f} {row['p99_ms']:>8.1f} {row['peak_rss_mb']:>7.1f}")
+                if row['staging_rows'] != size:
+                    print(f"  warning: staging has {row['staging_rows']} of {size} rows")
+    finally:
+        source.stop()
+        staging.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'faults': faults, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
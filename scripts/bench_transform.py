@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the support ticket transform in copy_pyro_tickets_supabase.py.
+
+Transforms synthetic source pages and reports rows/sec per table size, so the
+transform can be compared against fetch and insert throughput. The original
+per-ticket implementation is kept here as a reference: it is benchmarked
+alongside the compiled transform and used to check that both produce
+identical rows.
+
+Usage:
+    python scripts/bench_transform.py
+    python scripts/bench_transform.py --sizes 1000 100000 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from itertools import cycle
+from typing import Dict, List, Any, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from copy_pyro_tickets_supabase import SUPPORT_TICKET_TRANSFORM, compile_transform
+
+STAGING_TENANT_ID = 'e35e7279-d92d-4cdf-8014-98deaab639c0'
+
+def legacy_transform(tickets: List[Dict[str, Any]], staging_tenant_id: str) -> List[Dict[str, Any]]:
+    """Per-ticket transform as it was before the compiled mapping, for reference."""
+    transformed_tickets = []
+
+    for ticket in tickets:
+        transformed_ticket = {
+            'id': ticket.get('id'),
+            'name': ticket.get('name', 'Unknown'),
+            'reason': ticket.get('reason', 'No reason provided'),
+            'atleast_paid_once': False,
+            'resolution_status': 'Pending',
+            'call_attempts': 0
+        }
+
+        if staging_tenant_id:
+            transformed_ticket['tenant_id'] = staging_tenant_id
+
+        field_mapping = {
+            'ticket_date': 'ticket_date',
+            'user_id': 'user_id',
+            'phone': 'phone',
+            'source': 'source',
+            'subscription_status': 'subscription_status',
+            'badge': 'badge',
+            'poster': 'poster',
+            'layout_status': 'layout_status',
+            'resolution_time': 'resolution_time',
+            'cse_name': 'cse_name',
+            'cse_remarks': 'cse_remarks',
+            'call_status': 'call_status',
+            'assigned_to': 'assigned_to',
+            'rm_name': 'rm_name',
+            'completed_at': 'completed_at',
+            'snooze_until': 'snooze_until',
+            'praja_dashboard_user_link': 'praja_dashboard_user_link',
+            'display_pic_url': 'display_pic_url',
+            'dumped_at': 'dumped_at'
+        }
+
+        for source_field, target_field in field_mapping.items():
+            if source_field in ticket and ticket[source_field] is not None:
+                transformed_ticket[target_field] = ticket[source_field]
+
+        if 'atleast_paid_once' in ticket and ticket['atleast_paid_once'] is not None:
+            transformed_ticket['atleast_paid_once'] = ticket['atleast_paid_once']
+
+        if 'other_reasons' in ticket and ticket['other_reasons'] is not None:
+            if isinstance(ticket['other_reasons'], list):
+                transformed_ticket['other_reasons'] = ticket['other_reasons']
+            elif isinstance(ticket['other_reasons'], str):
+                try:
+                    parsed = json.loads(ticket['other_reasons'])
+                    if isinstance(parsed, list):
+                        transformed_ticket['other_reasons'] = parsed
+                    else:
+                        transformed_ticket['other_reasons'] = [ticket['other_reasons']]
+                except:
+                    transformed_ticket['other_reasons'] = [ticket['other_reasons']]
+
+        if 'call_attempts' in ticket and ticket['call_attempts'] is not None:
+            transformed_ticket['call_attempts'] = ticket['call_attempts']
+
+        if 'call_status' not in transformed_ticket or transformed_ticket['call_status'] is None:
+            transformed_ticket['call_status'] = 'Call Waiting'
+
+        if 'assigned_to' in transformed_ticket and transformed_ticket['assigned_to'] is not None:
+            transformed_ticket['assigned_to'] = '2e81a97e-c091-45a8-a7f4-213d00c6db7a'
+
+        transformed_tickets.append(transformed_ticket)
+
+    return transformed_tickets
+
+def synthetic_ticket(ticket_id: int, rng: random.Random) -> Dict[str, Any]:
+    """Build a source support_ticket row with a realistic mix of nulls and value types."""
+    def maybe(value: Any, null_rate: float = 0.3) -> Any:
+        return None if rng.random() < null_rate else value
+
+    ticket = {
+        'id': ticket_id,
+        'ticket_date': '2024-06-01T10:15:00+00:00',
+        'user_id': maybe(str(rng.randint(1, 10 ** 7))),
+        'name': maybe(f'User {ticket_id}', 0.05),
+        'phone': maybe(f'+91{rng.randint(6000000000, 9999999999)}'),
+        'source': maybe(rng.choice(['app', 'web', 'whatsapp'])),
+        'subscription_status': maybe(rng.choice(['active', 'trial', 'expired'])),
+        'atleast_paid_once': maybe(rng.random() < 0.5),
+        'reason': maybe('Payment failed', 0.05),
+        'other_reasons': rng.choice([None, ['Refund'], '["Poster", "Badge"]', 'Layout issue', '{}']),
+        'badge': maybe('gold', 0.7),
+        'poster': maybe('poster.png', 0.7),
+        'tenant_id': 'source-tenant',
+        'layout_status': maybe('done', 0.6),
+        'resolution_status': rng.choice(['Pending', 'Resolved']),
+        'resolution_time': maybe('2h', 0.8),
+        'cse_name': maybe('Agent', 0.5),
+        'cse_remarks': maybe('Called back', 0.6),
+        'cse_called_date': maybe('2024-06-02T09:00:00+00:00', 0.6),
+        'call_status': maybe('Connected', 0.5),
+        'call_duration': '0s',
+        'call_attempts': maybe(rng.randint(0, 5)),
+        'assigned_to': maybe('9b1f0c7e-1111-2222-3333-444455556666', 0.6),
+        'rm_name': maybe('RM', 0.8),
+        'completed_at': maybe('2024-06-03T12:00:00+00:00', 0.7),
+        'snooze_until': maybe('2024-06-04T12:00:00+00:00', 0.9),
+        'created_at': '2024-06-01T10:15:00+00:00',
+        'updated_at': '2024-06-02T10:15:00+00:00',
+    }
+    return ticket
+
+def synthetic_pages(total: int, page_size: int, distinct_pages: int, seed: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages until total rows, cycling through a fixed pool of distinct pages to bound memory."""
+    rng = random.Random(seed)
+    pool_pages = min(distinct_pages, (total + page_size - 1) // page_size)
+    pool = [
+        [synthetic_ticket(page * page_size + i + 1, rng) for i in range(page_size)]
+        for page in range(pool_pages)
+    ]
+
+    remaining = total
+    for page in cycle(pool):
+        if remaining <= 0:
+            return
+        yield page[:remaining]
+        remaining -= len(page)
+
+def bench(name: str, transform_page, total: int, page_size: int, repeat: int, seed: int) -> float:
+    """Return the best rows/sec over repeat runs."""
+    pages = list(synthetic_pages(total, page_size, 20, seed))
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in pages:
+            transform_page(page)
+        elapsed = time.perf_counter() - started
+        best = max(best, total / elapsed)
+    print(f"  {name:<10} {best:>14,.0f} rows/s")
+    return best
+
+def check_parity(transform_page, pages: int, page_size: int, seed: int) -> None:
+    """Assert that the compiled and legacy transforms produce identical rows."""
+    for page in synthetic_pages(pages * page_size, page_size, pages, seed):
+        expected = legacy_transform(page, STAGING_TENANT_ID)
+        actual = transform_page(page)
+        for expected_row, actual_row in zip(expected, actual):
+            if list(expected_row.items()) != list(actual_row.items()):
+                raise SystemExit(f"Transform mismatch for ticket {expected_row['id']}:\n"
+                                 f"  legacy:   {expected_row}\n  compiled: {actual_row}")
+        if len(expected) != len(actual):
+            raise SystemExit("Transform mismatch: row counts differ")
+    print(f"Parity check passed on {pages * page_size:,} synthetic tickets")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the support ticket transform')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help='Ticket counts to transform')
+    parser.add_argument('--page-size', type=int, default=1000, help='Tickets per page')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size, best is reported')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for synthetic tickets')
+    parser.add_argument('--no-legacy', action='store_true', help='Skip benchmarking the legacy transform')
+
+    args = parser.parse_args()
+
+    transform_page = compile_transform(SUPPORT_TICKET_TRANSFORM, {'staging_tenant_id': STAGING_TENANT_ID})
+    check_parity(transform_page, 20, args.page_size, args.seed)
+
+    for size in args.sizes:
+        print(f"{size:,} tickets (pages of {args.page_size}):")
+        compiled = bench('compiled', transform_page, size, args.page_size, args.repeat, args.seed)
+        if not args.no_legacy:
+            legacy = bench('legacy', lambda page: legacy_transform(page, STAGING_TENANT_ID),
+                           size, args.page_size, args.repeat, args.seed)
+            print(f"  speedup    {compiled / legacy:>14.2f}x")
+
+if __name__ == "__main__":
+    main()
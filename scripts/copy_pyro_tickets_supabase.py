@@ -3,14 +3,53 @@ import os
 import sys
 import json
 import logging
+import queue
+import asyncio
+import signal
+import socket
+import sqlite3
+import threading
+import gzip
 import time
-from typing import Dict, List, Any, Optional, Set
-from datetime import datetime
+import random
+import uuid
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
+from datetime import date, datetime, timezone
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import quote, urlsplit
+from email.utils import parsedate_to_datetime
 from supabase import create_client, Client
 
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+try:
+    import orjson
+except ImportError:  # Optional, faster JSON encoding and decoding
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # Optional, incremental parsing of large source pages
+    ijson = None
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.types.json import Jsonb
+except ImportError:  # Only needed for the COPY insert backend
+    psycopg = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,8 +61,1274 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Declarative mapping from a source support_ticket row to a staging row.
+# Each entry is (target field, source field, rule, argument) and entries are
+# applied in order:
+#   get        row.get(source, argument), so a present null stays null
+#   default    source value, or argument if it is missing or null
+#   constant   always argument
+#   param      compile-time parameter named by argument, skipped if empty
+#   copy       source value, only if present and not null
+#   text_array source value as a list of strings (JSON array text is parsed,
+#              any other string is wrapped), only if present and not null
+#   fill       argument, only if no earlier rule set a non-null value
+#   replace    argument, only if an earlier rule set a non-null value
+SUPPORT_TICKET_TRANSFORM: List[Tuple[str, Optional[str], str, Any]] = [
+    ('id', 'id', 'get', None),
+    ('name', 'name', 'get', 'Unknown'),
+    ('reason', 'reason', 'get', 'No reason provided'),
+    ('atleast_paid_once', 'atleast_paid_once', 'default', False),
+    ('resolution_status', None, 'constant', 'Pending'),
+    ('call_attempts', 'call_attempts', 'default', 0),
+    ('tenant_id', None, 'param', 'staging_tenant_id'),
+    ('ticket_date', 'ticket_date', 'copy', None),
+    ('user_id', 'user_id', 'copy', None),
+    ('phone', 'phone', 'copy', None),
+    ('source', 'source', 'copy', None),
+    ('subscription_status', 'subscription_status', 'copy', None),
+    ('badge', 'badge', 'copy', None),
+    ('poster', 'poster', 'copy', None),
+    ('layout_status', 'layout_status', 'copy', None),
+    ('resolution_time', 'resolution_time', 'copy', None),
+    ('cse_name', 'cse_name', 'copy', None),
+    ('cse_remarks', 'cse_remarks', 'copy', None),
+    ('call_status', 'call_status', 'copy', None),
+    ('assigned_to', 'assigned_to', 'copy', None),
+    ('rm_name', 'rm_name', 'copy', None),
+    ('completed_at', 'completed_at', 'copy', None),
+    ('snooze_until', 'snooze_until', 'copy', None),
+    ('praja_dashboard_user_link', 'praja_dashboard_user_link', 'copy', None),
+    ('display_pic_url', 'display_pic_url', 'copy', None),
+    ('dumped_at', 'dumped_at', 'copy', None),
+    ('other_reasons', 'other_reasons', 'text_array', None),
+    ('call_status', None, 'fill', 'Call Waiting'),
+    ('assigned_to', None, 'replace', '2e81a97e-c091-45a8-a7f4-213d00c6db7a'),
+]
+
+# Staging columns covered by support_ticket_row_digest (migration 009). Rows
+# upserted by --reconcile always carry these, so a value cleared in source
+# is cleared in staging too instead of being left out of the upsert.
+RECONCILE_COLUMNS = [
+    'user_id', 'name', 'phone', 'source', 'subscription_status', 'atleast_paid_once', 'reason',
+    'badge', 'poster', 'layout_status', 'resolution_time', 'cse_name', 'cse_remarks',
+    'call_status', 'call_attempts', 'rm_name', 'completed_at', 'snooze_until',
+]
+
+def json_dumps_bytes(value: Any) -> bytes:
+    """
+    Serialize a request body to JSON bytes, with orjson when it is installed.
+    
+    Args:
+        value: JSON-serializable value; other objects are encoded with str()
+        
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, default=str, separators=(',', ':')).encode('utf-8')
+
+def json_loads(data: bytes) -> Any:
+    """
+    Parse a JSON response body, with orjson when it is installed.
+    
+    Args:
+        data: UTF-8 encoded JSON
+        
+    Returns:
+        Decoded value
+        
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _to_text_array(value: Any) -> Optional[List[Any]]:
+    """
+    Coerce an other_reasons style value to a list.
+    
+    Args:
+        value: List, JSON array text or plain string
+        
+    Returns:
+        List value, or None for any other type
+    """
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except (ValueError, RecursionError):
+            return [value]
+        return parsed if isinstance(parsed, list) else [value]
+    return None
+
+def _bind_rule(target: str, source: Optional[str], rule: str, argument: Any,
+               params: Dict[str, Any]) -> Optional[Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], None]]:
+    """
+    Bind one mapping entry into an operation that sets a field on a page of rows.
+    
+    Args:
+        target: Target field
+        source: Source field
+        rule: Rule name, see SUPPORT_TICKET_TRANSFORM
+        argument: Rule argument
+        params: Values for ``param`` entries
+        
+    Returns:
+        Function called with the source rows and the target rows being built,
+        or None if the entry does nothing (an empty ``param``)
+        
+    Raises:
+        ValueError: If the rule is unknown
+    """
+    if rule == 'get':
+        def operation(rows, out):
+            for source_row, row in zip(rows, out):
+                row[target] = source_row.get(source, argument)
+    elif rule == 'default':
+        def operation(rows, out):
+            for source_row, row in zip(rows, out):
+                value = source_row.get(source)
+                row[target] = argument if value is None else value
+    elif rule == 'constant' or rule == 'param':
+        value = argument if rule == 'constant' else params.get(argument)
+        if rule == 'param' and not value:
+            return None
+        def operation(rows, out):
+            for row in out:
+                row[target] = value
+    elif rule == 'copy':
+        def operation(rows, out):
+            for source_row, row in zip(rows, out):
+                value = source_row.get(source)
+                if value is not None:
+                    row[target] = value
+    elif rule == 'text_array':
+        def operation(rows, out):
+            for source_row, row in zip(rows, out):
+                value = source_row.get(source)
+                if value is not None:
+                    value = _to_text_array(value)
+                    if value is not None:
+                        row[target] = value
+    elif rule == 'fill':
+        def operation(rows, out):
+            for row in out:
+                if row.get(target) is None:
+                    row[target] = argument
+    elif rule == 'replace':
+        def operation(rows, out):
+            for row in out:
+                if row.get(target) is not None:
+                    row[target] = argument
+    else:
+        raise ValueError(f"Unknown transform rule {rule!r} for field {target!r}")
+    return operation
+
+def compile_transform(spec: List[Tuple[str, Optional[str], str, Any]],
+                      params: Optional[Dict[str, Any]] = None) -> Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Compile a declarative row mapping into a function that transforms a page.
+    
+    Every entry is bound once into an operation with its field names and
+    constants captured. A page is transformed one entry at a time across all
+    of its rows, so the spec is walked once per page rather than once per row.
+    
+    Args:
+        spec: Mapping entries, see SUPPORT_TICKET_TRANSFORM for the rules
+        params: Values for ``param`` entries
+        
+    Returns:
+        Function mapping a list of source rows to a list of target rows
+    """
+    params = params or {}
+    operations = [_bind_rule(target, source, rule, argument, params)
+                  for target, source, rule, argument in spec]
+    operations = tuple(operation for operation in operations if operation is not None)
+    
+    def transform_page(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = [{} for _ in rows]
+        for operation in operations:
+            operation(rows, out)
+        return out
+    return transform_page
+
+class TableCopyConfig:
+    """
+    How to copy one table from source to staging.
+    
+    Args:
+        name: Table name, the same in both projects
+        key: Unique key column, used for keyset paging and on_conflict
+        transform: Row mapping in the SUPPORT_TICKET_TRANSFORM format. Overrides
+            such as the staging tenant_id are ``param``, ``constant`` or
+            ``replace`` entries.
+        depends_on: Tables whose rows this table references, copied first
+        select: PostgREST select expression for source rows (must include key)
+    """
+
+    def __init__(self, name: str, key: str, transform: List[Tuple[str, Optional[str], str, Any]],
+                 depends_on: Iterable[str] = (), select: str = '*'):
+        self.name = name
+        self.key = key
+        self.transform = transform
+        self.depends_on = tuple(depends_on)
+        self.select = select
+
+# Tables a staging refresh can copy, in a valid dependency order.
+# public.users is left out: uid points at auth.users, which differs per
+# project, and email is not unique, so there is no key to page and upsert on
+# until a schema change gives the table one.
+STAGING_TABLES: Dict[str, TableCopyConfig] = {config.name: config for config in [
+    TableCopyConfig('support_ticket', 'id', SUPPORT_TICKET_TRANSFORM),
+    TableCopyConfig('card_sets', 'id', [
+        ('id', 'id', 'get', None),
+        ('name', 'name', 'get', None),
+        ('created_at', 'created_at', 'copy', None),
+    ]),
+    TableCopyConfig('cards', 'id', [
+        ('id', 'id', 'get', None),
+        ('card_set_id', 'card_set_id', 'get', None),
+        ('title', 'title', 'get', None),
+        ('description', 'description', 'get', None),
+        ('number', 'number', 'get', None),
+        ('created_at', 'created_at', 'copy', None),
+    ], depends_on=['card_sets']),
+    TableCopyConfig('roles', 'id', [
+        ('id', 'id', 'get', None),
+        ('name', 'name', 'get', None),
+        ('tenant_id', None, 'param', 'staging_tenant_id'),
+        ('created_at', 'created_at', 'copy', None),
+    ]),
+]}
+
+class SupabaseRequestError(Exception):
+    """Raised when a Supabase REST request fails after all retries."""
+
+    def __init__(self, message: str, response: Optional[requests.Response] = None):
+        super().__init__(message)
+        self.response = response
+
+    @property
+    def status_code(self) -> Optional[int]:
+        return self.response.status_code if self.response is not None else None
+
+    @property
+    def is_data_error(self) -> bool:
+        """
+        True for responses that reject the rows sent: bad values (400, 422),
+        conflicts (409) or a body too large (413). Auth and not-found errors
+        are not data errors, since every batch would fail the same way.
+        """
+        return self.status_code in (400, 409, 413, 422)
+
+def diff_sorted_ids(source_ids: array, staging_ids: array) -> array:
+    """
+    Return the IDs in source_ids that are not in staging_ids.
+    
+    Both inputs must be sorted ascending without duplicates. The difference is
+    computed with a single merge pass, so no hash sets are built.
+    
+    Args:
+        source_ids: Sorted ticket IDs from source
+        staging_ids: Sorted ticket IDs from staging
+        
+    Returns:
+        Sorted array of missing ticket IDs
+    """
+    missing = array('q')
+    j = 0
+    staging_len = len(staging_ids)
+    for ticket_id in source_ids:
+        while j < staging_len and staging_ids[j] < ticket_id:
+            j += 1
+        if j < staging_len and staging_ids[j] == ticket_id:
+            continue
+        missing.append(ticket_id)
+    return missing
+
+def _peak_rss_bytes() -> Optional[int]:
+    """
+    Return the process memory high-water mark, if the platform reports it.
+    
+    Returns:
+        Peak resident set size in bytes, or None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class CopyMetrics:
+    """
+    Thread-safe counters, timers and latency histograms for one copy run.
+    
+    Stage times are busy time summed across threads, so with concurrent
+    workers a stage can report more seconds than the run's wall time.
+    """
+
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.requests: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.retries: Dict[Tuple[str, str, str], int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.summary: Dict[str, Any] = {}
+        self._progress_stop = threading.Event()
+        self._progress_thread: Optional[threading.Thread] = None
+
+    def record_stage(self, stage: str, seconds: float, rows: int = 0) -> None:
+        """
+        Add busy time and processed rows to a pipeline stage.
+        
+        Args:
+            stage: Stage name (fetch, diff, transform, insert, ...)
+            seconds: Time spent in the stage
+            rows: Rows the stage processed in that time
+        """
+        with self._lock:
+            totals = self.stages.setdefault(stage, {'seconds': 0.0, 'rows': 0, 'calls': 0})
+            totals['seconds'] += seconds
+            totals['rows'] += rows
+            totals['calls'] += 1
+
+    def observe_request(self, endpoint: Tuple[str, str, str], seconds: float, status: int,
+                        bytes_sent: int, bytes_received: int) -> None:
+        """
+        Record one HTTP attempt.
+        
+        Args:
+            endpoint: (project, method, path) of the request
+            seconds: Request latency
+            status: HTTP status code, 0 if no response was received
+            bytes_sent: Request body size
+            bytes_received: Response body size
+        """
+        with self._lock:
+            histogram = self.requests.get(endpoint)
+            if histogram is None:
+                histogram = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.LATENCY_BUCKETS), 'status': {}}
+                self.requests[endpoint] = histogram
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            for i, bound in enumerate(self.LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['status'][status] = histogram['status'].get(status, 0) + 1
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+
+    def record_retry(self, endpoint: Tuple[str, str, str]) -> None:
+        with self._lock:
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+
+    def start_progress(self, interval: float) -> None:
+        """
+        Log a progress line every interval seconds until finish() is called.
+        
+        Args:
+            interval: Seconds between progress lines (0 disables them)
+        """
+        if not interval or interval <= 0:
+            return
+        
+        def report() -> None:
+            while not self._progress_stop.wait(interval):
+                logger.info(self.progress_line())
+        
+        self._progress_thread = threading.Thread(target=report, name='copy-progress', daemon=True)
+        self._progress_thread.start()
+
+    def progress_line(self) -> str:
+        elapsed = time.perf_counter() - self._started
+        with self._lock:
+            parts = [f"{stage} {totals['rows']:,}" for stage, totals in self.stages.items()]
+            inserted = self.stages.get('insert', {}).get('rows', 0)
+        rate = inserted / elapsed if elapsed > 0 else 0.0
+        return f"Progress after {elapsed:.0f}s: {', '.join(parts) or 'starting'} ({rate:,.0f} inserted/s)"
+
+    def finish(self, summary: Dict[str, Any]) -> None:
+        """
+        Stop progress reporting and record the run summary.
+        
+        Args:
+            summary: Result returned by copy_tickets
+        """
+        self._progress_stop.set()
+        if self._progress_thread is not None:
+            self._progress_thread.join()
+        self.finished_at = time.time()
+        self.summary = dict(summary)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Build the machine-readable run report.
+        
+        Returns:
+            JSON-serializable report
+        """
+        with self._lock:
+            wall_seconds = (self.finished_at or time.time()) - self.started_at
+            stages = {
+                stage: {
+                    **totals,
+                    'rows_per_sec': totals['rows'] / totals['seconds'] if totals['seconds'] > 0 else None,
+                }
+                for stage, totals in self.stages.items()
+            }
+            requests_report = []
+            for (project, method, path), histogram in sorted(self.requests.items()):
+                requests_report.append({
+                    'project': project,
+                    'method': method,
+                    'path': path,
+                    'count': histogram['count'],
+                    'sum_seconds': histogram['sum'],
+                    'retries': self.retries.get((project, method, path), 0),
+                    'status': {str(status): count for status, count in sorted(histogram['status'].items())},
+                    'buckets': {str(bound): count for bound, count in zip(self.LATENCY_BUCKETS, histogram['buckets'])},
+                })
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+                'wall_seconds': wall_seconds,
+                'summary': self.summary,
+                'stages': stages,
+                'requests': requests_report,
+                'retries': sum(self.retries.values()),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'peak_rss_bytes': _peak_rss_bytes(),
+            }
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        logger.info(f"Run report written to {path}")
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write the report in Prometheus text exposition format, e.g. for the
+        node_exporter textfile collector.
+        
+        Args:
+            path: Output file, replaced atomically
+        """
+        report = self.to_dict()
+        lines = [
+            '# HELP pyro_copy_wall_seconds Wall time of the last copy run.',
+            '# TYPE pyro_copy_wall_seconds gauge',
+            f"pyro_copy_wall_seconds {report['wall_seconds']:.6f}",
+            '# HELP pyro_copy_last_run_timestamp_seconds Unix time the last copy run finished.',
+            '# TYPE pyro_copy_last_run_timestamp_seconds gauge',
+            f"pyro_copy_last_run_timestamp_seconds {self.finished_at or time.time():.3f}",
+            '# HELP pyro_copy_success Whether the last copy run succeeded.',
+            '# TYPE pyro_copy_success gauge',
+            f"pyro_copy_success {1 if report['summary'].get('success') else 0}",
+            '# HELP pyro_copy_inserted_rows Tickets inserted by the last copy run.',
+            '# TYPE pyro_copy_inserted_rows gauge',
+            f"pyro_copy_inserted_rows {report['summary'].get('inserted_count', 0)}",
+            '# HELP pyro_copy_stage_seconds Busy time per pipeline stage.',
+            '# TYPE pyro_copy_stage_seconds gauge',
+        ]
+        lines += [f'pyro_copy_stage_seconds{{stage="{stage}"}} {totals["seconds"]:.6f}'
+                  for stage, totals in report['stages'].items()]
+        lines += ['# HELP pyro_copy_stage_rows Rows processed per pipeline stage.',
+                  '# TYPE pyro_copy_stage_rows gauge']
+        lines += [f'pyro_copy_stage_rows{{stage="{stage}"}} {totals["rows"]}'
+                  for stage, totals in report['stages'].items()]
+        lines += ['# HELP pyro_copy_request_seconds Supabase REST request latency.',
+                  '# TYPE pyro_copy_request_seconds histogram']
+        for endpoint in report['requests']:
+            labels = f'project="{endpoint["project"]}",method="{endpoint["method"]}",path="{endpoint["path"]}"'
+            for bound, count in endpoint['buckets'].items():
+                lines.append(f'pyro_copy_request_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'pyro_copy_request_seconds_bucket{{{labels},le="+Inf"}} {endpoint["count"]}')
+            lines.append(f'pyro_copy_request_seconds_sum{{{labels}}} {endpoint["sum_seconds"]:.6f}')
+            lines.append(f'pyro_copy_request_seconds_count{{{labels}}} {endpoint["count"]}')
+        lines += ['# HELP pyro_copy_request_retries Retried Supabase REST requests.',
+                  '# TYPE pyro_copy_request_retries gauge']
+        for endpoint in report['requests']:
+            labels = f'project="{endpoint["project"]}",method="{endpoint["method"]}",path="{endpoint["path"]}"'
+            lines.append(f'pyro_copy_request_retries{{{labels}}} {endpoint["retries"]}')
+        lines += [
+            '# HELP pyro_copy_bytes_sent Request body bytes sent.',
+            '# TYPE pyro_copy_bytes_sent gauge',
+            f"pyro_copy_bytes_sent {report['bytes_sent']}",
+            '# HELP pyro_copy_bytes_received Response body bytes received.',
+            '# TYPE pyro_copy_bytes_received gauge',
+            f"pyro_copy_bytes_received {report['bytes_received']}",
+        ]
+        if report['peak_rss_bytes'] is not None:
+            lines += [
+                '# HELP pyro_copy_peak_rss_bytes Process memory high-water mark.',
+                '# TYPE pyro_copy_peak_rss_bytes gauge',
+                f"pyro_copy_peak_rss_bytes {report['peak_rss_bytes']}",
+            ]
+        
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+        logger.info(f"Prometheus metrics written to {path}")
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date.
+    
+    Args:
+        value: Header value
+        
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RateLimiter:
+    """
+    Token bucket shared by every worker sending requests to one project.
+    
+    With a rate configured, requests are spread to at most rate per second
+    (bursting up to one second's worth). Whenever the project throttles us,
+    throttle() pauses all workers until the Retry-After time has passed and
+    halves the rate, which then recovers gradually as requests succeed.
+    Without a rate only the shared pauses apply.
+    """
+
+    def __init__(self, rate: float = 0.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.tokens = max(rate, 1.0)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the project is not paused and a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait_time = self.paused_until - now
+                if wait_time <= 0:
+                    if self.rate <= 0:
+                        return
+                    self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+    def throttle(self, delay: float) -> None:
+        """
+        Pause every worker for delay seconds and back off the request rate.
+        
+        Args:
+            delay: Seconds to pause, e.g. from a Retry-After header
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Workers that were in flight together report the same throttling once
+            if self.max_rate > 0 and self.paused_until <= now:
+                self.rate = max(self.max_rate / 16, self.rate / 2)
+                self.tokens = min(self.tokens, 1.0)
+            self.paused_until = max(self.paused_until, now + delay)
+        logger.warning(f"Rate limited, pausing requests for {delay:.1f}s (rate now {self.rate:g}/s)")
+
+    def record_success(self) -> None:
+        """Recover the request rate after throttling, a little per success."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+class PostgresCopyLoader:
+    """
+    Bulk-load rows into a staging table over a direct Postgres connection.
+    
+    Rows are sent with ``COPY <table> (...) FROM STDIN`` in text or binary
+    format and committed every chunk. A column a row leaves out is sent as
+    NULL, unless the column has a default, in which case rows are grouped so
+    the default still applies, as with PostgREST inserts. Upserts COPY into a
+    temporary table first and merge with ``INSERT ... ON CONFLICT``. Requires
+    psycopg 3.
+    
+    Args:
+        dsn: libpq connection string of the staging database
+        table: Table to load, in the public schema
+        key: Unique key column, used for upserts and the sequence fix-up
+        copy_format: 'text' or 'binary'
+        upsert: None, 'merge' or 'ignore', as SupabaseTicketCopier.upsert
+    """
+
+    def __init__(self, dsn: str, table: str = 'support_ticket', key: str = 'id',
+                 copy_format: str = 'text', upsert: Optional[str] = None):
+        if psycopg is None:
+            raise RuntimeError("The COPY insert backend requires psycopg 3 (pip install 'psycopg[binary]')")
+        if copy_format not in ('text', 'binary'):
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+        self.table = table
+        self.key = key
+        self.copy_format = copy_format
+        self.upsert = upsert
+        self.conn = psycopg.connect(dsn, autocommit=True)
+        
+        rows = self.conn.execute(
+            "SELECT column_name, udt_name, column_default IS NOT NULL FROM information_schema.columns "
+            "WHERE table_schema = 'public' AND table_name = %s ORDER BY ordinal_position", (table,)
+        ).fetchall()
+        if not rows:
+            raise ValueError(f"Table public.{table} not found in the staging database")
+        self.column_types = {name: udt_name for name, udt_name, _ in rows}
+        self.defaulted = {name for name, _, has_default in rows if has_default}
+        self._converters = {name: self._converter(udt_name) for name, udt_name in self.column_types.items()}
+        self._staged = False
+
+    def _converter(self, udt_name: str) -> Optional[Callable[[Any], Any]]:
+        """Return the function adapting JSON values for a column type, if any."""
+        if udt_name in ('json', 'jsonb'):
+            return Jsonb
+        if self.copy_format == 'text':
+            return None
+        # Binary COPY needs Python values of the exact column type
+        if udt_name in ('timestamptz', 'timestamp'):
+            return lambda value: datetime.fromisoformat(value) if isinstance(value, str) else value
+        if udt_name == 'date':
+            return lambda value: date.fromisoformat(value) if isinstance(value, str) else value
+        if udt_name == 'uuid':
+            return lambda value: uuid.UUID(value) if isinstance(value, str) else value
+        if udt_name in ('text', 'varchar', 'bpchar'):
+            return lambda value: value if isinstance(value, str) else str(value)
+        return None
+
+    def load(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        COPY one chunk of rows in a single transaction.
+        
+        Args:
+            rows: Transformed rows
+            
+        Returns:
+            Number of rows written
+            
+        Raises:
+            psycopg.Error: If the database rejects the chunk, after rolling it back
+        """
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        unknown = [column for column in columns if column not in self.column_types]
+        if unknown:
+            raise ValueError(f"Columns not in public.{self.table}: {', '.join(unknown)}")
+        
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in rows:
+            group_columns = tuple(column for column in columns if column in row or column not in self.defaulted)
+            groups.setdefault(group_columns, []).append(row)
+        
+        written = 0
+        try:
+            with self.conn.transaction():
+                for group_columns, group_rows in groups.items():
+                    written += self._load_group(group_columns, group_rows)
+        except psycopg.Error:
+            self._staged = False
+            raise
+        return written
+
+    def _load_group(self, columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> int:
+        """COPY rows that share a column list, merging through a temp table when upserting."""
+        target = sql.Identifier(self.table)
+        if self.upsert:
+            if not self._staged:
+                self.conn.execute(sql.SQL(
+                    "CREATE TEMP TABLE IF NOT EXISTS {} (LIKE public.{} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                ).format(sql.Identifier(f'_{self.table}_copy'), target))
+                self._staged = True
+            copy_target = sql.Identifier(f'_{self.table}_copy')
+        else:
+            copy_target = sql.SQL('public.{}').format(target)
+        
+        column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+        statement = sql.SQL("COPY {} ({}) FROM STDIN").format(copy_target, column_list)
+        if self.copy_format == 'binary':
+            statement += sql.SQL(" (FORMAT BINARY)")
+        
+        converters = [(column, self._converters[column]) for column in columns]
+        with self.conn.cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                if self.copy_format == 'binary':
+                    copy.set_types([self.column_types[column] for column in columns])
+                for row in rows:
+                    values = []
+                    for column, convert in converters:
+                        value = row.get(column)
+                        values.append(convert(value) if convert is not None and value is not None else value)
+                    copy.write_row(values)
+            
+            if not self.upsert:
+                return len(rows)
+            
+            if self.upsert == 'merge':
+                updates = [column for column in columns if column != self.key]
+                action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(', ').join(
+                    sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column)) for column in updates))
+            else:
+                action = sql.SQL("DO NOTHING")
+            cursor.execute(sql.SQL("INSERT INTO public.{} ({}) SELECT {} FROM {} ON CONFLICT ({}) {}").format(
+                target, column_list, column_list, copy_target, sql.Identifier(self.key), action))
+            written = cursor.rowcount
+            cursor.execute(sql.SQL("DELETE FROM {}").format(copy_target))
+            return written
+
+    def fix_sequence(self) -> None:
+        """Move the key column's sequence past the largest key, so later inserts do not collide."""
+        with self.conn.transaction():
+            row = self.conn.execute("SELECT pg_get_serial_sequence(%s, %s)",
+                                    (f'public.{self.table}', self.key)).fetchone()
+            if row is None or row[0] is None:
+                return
+            self.conn.execute(sql.SQL(
+                "SELECT setval(%s, coalesce(max({0}), 1), max({0}) IS NOT NULL) FROM public.{1}"
+            ).format(sql.Identifier(self.key), sql.Identifier(self.table)), (row[0],))
+        logger.info(f"Reset sequence {row[0]} past the largest {self.table}.{self.key}")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+class SyncCheckpoint:
+    """
+    Persisted high-water mark of an incremental copy, stored as a JSON file.
+    
+    The file records the highest source ticket ``id`` below which every ticket
+    is known to be committed to staging. Ticket ids come from a SERIAL, so new
+    source tickets always sort after the mark.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the saved state.
+        
+        Returns:
+            Saved state, or an empty dict if no checkpoint exists yet
+        """
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring unreadable checkpoint file {self.path}")
+            return {}
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """
+        Atomically replace the saved state.
+        
+        Args:
+            state: State to persist
+        """
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+class ShardLeaseStore:
+    """
+    Shared SQLite record of a sharded copy: the id range of every shard, its
+    progress, and which worker holds it.
+    
+    A worker owns a shard through a lease that it renews with heartbeats. A
+    shard whose lease ran out (its worker crashed or was stopped) can be
+    claimed by any other worker, which resumes after the shard's last
+    committed id. The file can live on a volume shared by several machines
+    if that filesystem supports SQLite locking and their clocks roughly agree.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shard_plan (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    source_url TEXT NOT NULL,
+                    shard_count INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shards (
+                    shard INTEGER PRIMARY KEY,
+                    after_id INTEGER NOT NULL,
+                    max_id INTEGER NOT NULL,
+                    last_id INTEGER,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    owner TEXT,
+                    lease_expires REAL,
+                    copied INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT
+                )""")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode; callers use BEGIN IMMEDIATE to serialize writers."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+
+    def ensure_plan(self, source_url: str, shard_count: int, min_id: int, max_id: int) -> bool:
+        """
+        Record the split of (min_id - 1, max_id] into shard_count equal id ranges,
+        unless an earlier worker already did.
+        
+        Returns:
+            True if this call created the plan
+            
+        Raises:
+            ValueError: If the store holds a plan for another source or shard count
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            plan = conn.execute("SELECT source_url, shard_count FROM shard_plan").fetchone()
+            if plan is not None:
+                conn.execute("COMMIT")
+                if (plan['source_url'], plan['shard_count']) != (source_url, shard_count):
+                    raise ValueError(f"Shard store {self.path} holds a plan for {plan['shard_count']} shards of "
+                                     f"{plan['source_url']}; pass a new --shard-store for this copy")
+                return False
+            
+            after_id = min_id - 1
+            width = -(-(max_id - after_id) // shard_count)
+            conn.execute("INSERT INTO shard_plan VALUES (1, ?, ?, ?)",
+                         (source_url, shard_count, datetime.now(timezone.utc).isoformat()))
+            conn.executemany(
+                "INSERT INTO shards (shard, after_id, max_id) VALUES (?, ?, ?)",
+                [(shard, after_id + shard * width, min(after_id + (shard + 1) * width, max_id))
+                 for shard in range(shard_count)])
+            conn.execute("COMMIT")
+        logger.info(f"Split ids {min_id}..{max_id} into {shard_count} shards in {self.path}")
+        return True
+
+    def claim(self, owner: str, shard: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Take the lease on a shard that is not done and not leased by a live worker.
+        
+        Args:
+            owner: Unique name of the claiming worker
+            shard: Shard to claim, or None for any shard whose lease has expired
+            
+        Returns:
+            The claimed shard row, or None if there is nothing to claim
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if shard is not None:
+                row = conn.execute(
+                    "SELECT * FROM shards WHERE shard = ? AND status != 'done' "
+                    "AND (owner IS NULL OR owner = ? OR lease_expires < ?)", (shard, owner, now)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT * FROM shards WHERE status = 'running' AND lease_expires < ? "
+                    "ORDER BY shard LIMIT 1", (now,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'running', owner = ?, lease_expires = ?, updated_at = ? WHERE shard = ?",
+                (owner, now + self.lease_seconds, datetime.now(timezone.utc).isoformat(), row['shard']))
+            conn.execute("COMMIT")
+        if row['owner'] not in (None, owner):
+            logger.warning(f"Reclaimed shard {row['shard']} from {row['owner']}, resuming after id {row['last_id']}")
+        return dict(row)
+
+    def heartbeat(self, shard: int, owner: str) -> bool:
+        """
+        Renew a lease.
+        
+        Returns:
+            False if the lease was lost to another worker
+        """
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE shards SET lease_expires = ?, updated_at = ? WHERE shard = ? AND owner = ?",
+                (time.time() + self.lease_seconds, datetime.now(timezone.utc).isoformat(), shard, owner)).rowcount
+        return updated == 1
+
+    def save_progress(self, shard: int, owner: str, last_id: int) -> None:
+        """Record the shard's committed watermark, if still the owner."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE shards SET last_id = ?, updated_at = ? WHERE shard = ? AND owner = ?",
+                (last_id, datetime.now(timezone.utc).isoformat(), shard, owner))
+
+    def release(self, shard: int, owner: str, done: bool, copied: int = 0) -> None:
+        """
+        Give up a lease, marking the shard done or leaving it for another worker to reclaim.
+        
+        Args:
+            shard: Shard number
+            owner: Worker holding the lease
+            done: Whether every ticket of the shard was committed
+            copied: Tickets this worker inserted, added to the shard's count
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE shards SET status = ?, lease_expires = 0, copied = copied + ?, updated_at = ? "
+                "WHERE shard = ? AND owner = ?",
+                ('done' if done else 'running', copied, datetime.now(timezone.utc).isoformat(), shard, owner))
+
+    def summary(self) -> Dict[str, int]:
+        """Count shards by status."""
+        with self._connect() as conn:
+            return {row['status']: row['count'] for row in
+                    conn.execute("SELECT status, count(*) AS count FROM shards GROUP BY status")}
+
+class _ShardCheckpoint:
+    """Checkpoint for WatermarkTracker that saves a shard's progress to the lease store."""
+
+    def __init__(self, store: ShardLeaseStore, shard: int, owner: str):
+        self.store = store
+        self.shard = shard
+        self.owner = owner
+
+    def save(self, state: Dict[str, Any]) -> None:
+        self.store.save_progress(self.shard, self.owner, state['last_id'])
+
+class WatermarkTracker:
+    """
+    Advance a checkpoint as insert batches complete.
+    
+    Batches are registered in source id order and may complete out of order
+    when several insert workers run. The watermark only moves past a batch once
+    it and every batch before it have been committed, and stops for the rest
+    of the run at the first failed batch, so a resumed run never skips tickets.
+    """
+
+    def __init__(self, checkpoint: SyncCheckpoint, state: Dict[str, Any]):
+        self.checkpoint = checkpoint
+        self.state = dict(state)
+        self._lock = threading.Lock()
+        self._registered: Dict[int, int] = {}
+        self._completed: Dict[int, bool] = {}
+        self._next_batch = 1
+        self._last_registered = 0
+        self._stalled = False
+
+    @property
+    def stalled(self) -> bool:
+        """Whether a batch failed, so the watermark stopped short of the tickets seen."""
+        return self._stalled
+
+    def track(self, batches: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Register batches as they are handed to the insert stage.
+        
+        Args:
+            batches: Batches of transformed tickets in source id order
+            
+        Yields:
+            The same batches
+        """
+        for batch in batches:
+            last_id = max(ticket['id'] for ticket in batch)
+            with self._lock:
+                self._last_registered += 1
+                self._registered[self._last_registered] = last_id
+            yield batch
+
+    def batch_done(self, batch_num: int, batch: List[Dict[str, Any]], inserted_count: Optional[int]) -> None:
+        """
+        Record a completed batch and persist the watermark if it advanced.
+        
+        Args:
+            batch_num: 1-based batch number, in registration order
+            batch: The batch that completed
+            inserted_count: Inserted ticket count, or None if the batch failed
+        """
+        with self._lock:
+            self._completed[batch_num] = inserted_count is not None
+            advanced = False
+            while not self._stalled and self._next_batch in self._completed:
+                if not self._completed.pop(self._next_batch):
+                    self._stalled = True
+                    logger.warning(f"Checkpoint held at id {self.state.get('last_id')}: batch {self._next_batch} failed")
+                    break
+                # max() keeps the watermark from moving back when a batch only
+                # holds late-committed tickets below it (--follow lookback)
+                self.state['last_id'] = max(self.state.get('last_id') or 0, self._registered.pop(self._next_batch))
+                self._next_batch += 1
+                advanced = True
+            
+            if advanced:
+                self._save()
+
+    def _save(self) -> None:
+        self.state['saved_at'] = datetime.now(timezone.utc).isoformat()
+        self.checkpoint.save(self.state)
+
+class AdaptiveBatcher:
+    """
+    Cut insert batches whose size adapts to how inserts are going.
+    
+    Batches start large. A batch rejected by staging halves the size for the
+    following batches (the rejected batch itself is bisected by the copier),
+    and every grow_after consecutive successful batches double it again, up
+    to max_size.
+    """
+
+    def __init__(self, initial_size: int, max_size: int, grow_after: int = 3):
+        self.max_size = max(1, max_size)
+        self.size = max(1, min(initial_size, self.max_size))
+        self.grow_after = grow_after
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def batches(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Re-chunk a stream of ticket pages using the current batch size.
+        
+        Args:
+            pages: Pages of transformed ticket data
+            
+        Yields:
+            Batches of tickets
+        """
+        batch = []
+        for page in pages:
+            for ticket in page:
+                batch.append(ticket)
+                if len(batch) >= self.size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.grow_after and self.size < self.max_size:
+                self.size = min(self.size * 2, self.max_size)
+                self._successes = 0
+                logger.info(f"Batch size increased to {self.size}")
+
+    def record_failure(self, failed_size: int) -> None:
+        with self._lock:
+            self._successes = 0
+            new_size = max(1, min(self.size, failed_size // 2))
+            if new_size != self.size:
+                self.size = new_size
+                logger.info(f"Batch size reduced to {self.size}")
+
+class SnapshotWriter:
+    """
+    Write fetched source pages to a local snapshot directory.
+    
+    Pages are appended as gzip-compressed NDJSON to numbered segment files,
+    rolling over to a new segment every segment_rows rows. ``index.json``
+    lists each completed segment with its id range, row count and fetch
+    timestamps, and is rewritten as segments close, so a snapshot cut short
+    still replays up to its last completed segment. Starting a snapshot in a
+    directory replaces the index of any snapshot already there before its
+    segment files are deleted and rewritten, so the old index never points
+    at a segment of the new one.
+    """
+
+    def __init__(self, directory: str, source_url: str, segment_rows: int = 50000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_rows = segment_rows
+        self.index: Dict[str, Any] = {
+            'version': 1,
+            'source_url': source_url,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'ordered': True,
+            'segments': [],
+        }
+        self._file = None
+        self._segment: Optional[Dict[str, Any]] = None
+        self._last_id: Optional[int] = None
+        
+        self._write_index()
+        for stale in self.directory.glob('segment-*.ndjson.gz'):
+            stale.unlink()
+
+    def write_page(self, page: List[Dict[str, Any]]) -> None:
+        """
+        Append a page of tickets to the current segment.
+        
+        Args:
+            page: Page of raw ticket data from source
+        """
+        if not page:
+            return
+        if self._segment is None:
+            self._open_segment()
+        
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        ids = [ticket['id'] for ticket in page]
+        page_min, page_max = min(ids), max(ids)
+        if self._last_id is not None and page_min <= self._last_id:
+            self.index['ordered'] = False
+        self._last_id = max(page_max, self._last_id or page_max)
+        
+        for ticket in page:
+            self._file.write(json.dumps(ticket, default=str) + '\n')
+        
+        segment = self._segment
+        segment['rows'] += len(page)
+        segment['min_id'] = page_min if segment['min_id'] is None else min(segment['min_id'], page_min)
+        segment['max_id'] = page_max if segment['max_id'] is None else max(segment['max_id'], page_max)
+        segment['first_fetched_at'] = segment['first_fetched_at'] or fetched_at
+        segment['last_fetched_at'] = fetched_at
+        
+        if segment['rows'] >= self.segment_rows:
+            self._close_segment()
+
+    def close(self) -> None:
+        """Close the current segment and write the final index."""
+        self._close_segment()
+        self._write_index()
+        logger.info(f"Snapshot written to {self.directory}: "
+                    f"{sum(s['rows'] for s in self.index['segments'])} tickets in {len(self.index['segments'])} segments")
+
+    def _open_segment(self) -> None:
+        name = f"segment-{len(self.index['segments']) + 1:06d}.ndjson.gz"
+        self._file = gzip.open(self.directory / name, 'wt', encoding='utf-8')
+        self._segment = {
+            'file': name,
+            'rows': 0,
+            'min_id': None,
+            'max_id': None,
+            'first_fetched_at': None,
+            'last_fetched_at': None,
+        }
+
+    def _close_segment(self) -> None:
+        if self._segment is None:
+            return
+        self._file.close()
+        self.index['segments'].append(self._segment)
+        self._file = None
+        self._segment = None
+        self._write_index()
+
+    def _write_index(self) -> None:
+        tmp_path = self.directory / 'index.json.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.directory / 'index.json')
+
+class SnapshotReader:
+    """
+    Replay source pages from a snapshot directory written by SnapshotWriter.
+    
+    Segments are decompressed and parsed line by line, so replaying a
+    snapshot holds no more than one page in memory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        index_path = self.directory / 'index.json'
+        if not index_path.exists():
+            raise FileNotFoundError(f"No snapshot index found at {index_path}")
+        with open(index_path, 'r') as f:
+            self.index = json.load(f)
+
+    @property
+    def ordered(self) -> bool:
+        """True if the snapshot was written in ascending id order."""
+        return self.index.get('ordered', False)
+
+    def iter_pages(self, page_size: int, limit: int = None, select: str = '*',
+                   after_id: Optional[int] = None, ids: Optional[array] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream snapshot tickets as pages.
+        
+        Args:
+            page_size: Number of tickets per page
+            limit: Maximum number of tickets to return (None for all tickets)
+            select: Comma separated columns to keep, or '*' for whole rows
+            after_id: Only return tickets with an id greater than this
+            ids: Only return tickets whose id is in this sorted array
+            
+        Yields:
+            Pages of ticket data
+        """
+        columns = None if select == '*' else select.split(',')
+        returned = 0
+        page = []
+        
+        segments = self.index['segments']
+        if self.ordered:
+            segments = sorted(segments, key=lambda segment: segment['min_id'])
+        
+        for segment in segments:
+            if after_id is not None and segment['max_id'] <= after_id:
+                continue
+            if ids is not None and not self._range_has_ids(ids, segment['min_id'], segment['max_id']):
+                continue
+            
+            with gzip.open(self.directory / segment['file'], 'rt', encoding='utf-8') as f:
+                for line in f:
+                    ticket = json.loads(line)
+                    ticket_id = ticket['id']
+                    if after_id is not None and ticket_id <= after_id:
+                        continue
+                    if ids is not None and not self._range_has_ids(ids, ticket_id, ticket_id):
+                        continue
+                    if columns is not None:
+                        ticket = {column: ticket.get(column) for column in columns}
+                    page.append(ticket)
+                    returned += 1
+                    
+                    if limit and returned >= limit:
+                        yield page
+                        return
+                    if len(page) >= page_size:
+                        yield page
+                        page = []
+        
+        if page:
+            yield page
+
+    @staticmethod
+    def _range_has_ids(ids: array, low: int, high: int) -> bool:
+        position = bisect_left(ids, low)
+        return position < len(ids) and ids[position] <= high
+
 class SupabaseTicketCopier:
-    def __init__(self, source_url: str, source_key: str, staging_url: str, staging_key: str):
+    def __init__(self, source_url: str, source_key: str, staging_url: str, staging_key: str,
+                 staging_service_key: Optional[str] = None):
         """
         Initialize the Supabase support ticket copier.
         
@@ -32,6 +1337,8 @@ class SupabaseTicketCopier:
             source_key: Supabase anon key for source
             staging_url: Supabase project URL for staging
             staging_key: Supabase anon key for staging
+            staging_service_key: Supabase service role key for staging, used to
+                bypass RLS (defaults to STAGING_SERVICE_ROLE_KEY)
         """
         self.source_url = source_url.rstrip('/')
         self.source_key = source_key
@@ -41,413 +1348,2315 @@ class SupabaseTicketCopier:
         # Default staging tenant ID
         self.staging_tenant_id = os.getenv('STAGING_TENANT_ID', 'e35e7279-d92d-4cdf-8014-98deaab639c0')
         
-
+
+        
+        # Configuration
+        self.batch_size = int(os.getenv('BATCH_SIZE', '1'))  # Use batch size of 1 for reliability
+        self.max_retries = int(os.getenv('MAX_RETRIES', '3'))
+        self.retry_delay = float(os.getenv('RETRY_DELAY', '1.0'))
+        self.max_retry_delay = float(os.getenv('MAX_RETRY_DELAY', '30'))
+        self.rate_limit = float(os.getenv('RATE_LIMIT', '0'))  # Requests/sec per project, 0 for no limit
+        self.page_size = int(os.getenv('PAGE_SIZE', '1000'))
+        self.json_chunk_rows = int(os.getenv('JSON_CHUNK_ROWS', '1000'))  # Larger pages are parsed incrementally with ijson
+        self.workers = int(os.getenv('INSERT_WORKERS', '1'))  # Concurrent insert requests
+        self.fetch_workers = int(os.getenv('FETCH_WORKERS', '1'))  # Concurrent source id-range readers
+        self.table_workers = int(os.getenv('TABLE_WORKERS', '1'))  # Tables copied concurrently by copy_tables
+        self.id_batch_size = int(os.getenv('ID_BATCH_SIZE', '300'))  # IDs per id=in.(...) request
+        # Reconcile splits id ranges into this many sub-ranges per level and
+        # compares per-ticket digests once a range is at most this many ids wide
+        self.reconcile_fanout = int(os.getenv('RECONCILE_FANOUT', '64'))
+        self.reconcile_leaf_size = int(os.getenv('RECONCILE_LEAF_SIZE', '500'))
+        self.state_file = os.getenv('STATE_FILE', 'pyro_ticket_copy_state.json')  # Incremental sync checkpoint
+        # None inserts plainly, 'merge' or 'ignore' upserts on id conflicts
+        self.upsert = os.getenv('UPSERT_MODE') or None
+        # Adaptive batching starts large, bisects rejected batches and writes
+        # the offending rows to reject_file
+        self.adaptive_batching = False
+        self.adaptive_batch_size = int(os.getenv('ADAPTIVE_BATCH_SIZE', '500'))
+        self.max_batch_size = int(os.getenv('MAX_BATCH_SIZE', '1000'))
+        self.reject_file = os.getenv('REJECT_FILE', 'pyro_ticket_rejects.ndjson')
+        self._batcher: Optional[AdaptiveBatcher] = None
+        # --follow bisects rejected batches with fixed batch sizes too, so one
+        # bad ticket cannot hold its checkpoint for the life of the process
+        self._bisect_rejects = False
+        # Write fetched source pages to snapshot_dir, or replay them from from_snapshot
+        self.snapshot_dir: Optional[str] = None
+        self.from_snapshot: Optional[str] = None
+        self.snapshot_segment_rows = int(os.getenv('SNAPSHOT_SEGMENT_ROWS', '50000'))
+        self._transform: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None
+        self._transform_params: Optional[Dict[str, Any]] = None
+        
+        # Run metrics and where to report them
+        self.metrics = CopyMetrics()
+        self.report_json: Optional[str] = os.getenv('REPORT_JSON')
+        self.report_prometheus: Optional[str] = os.getenv('REPORT_PROMETHEUS')
+        self.progress_interval = float(os.getenv('PROGRESS_INTERVAL', '0'))
+        self._reject_lock = threading.Lock()
+        # 'rest' inserts through PostgREST, 'copy' bulk-loads over a direct
+        # Postgres connection to staging_dsn with COPY in copy_format
+        self.insert_backend = os.getenv('INSERT_BACKEND', 'rest')
+        self.staging_dsn: Optional[str] = os.getenv('STAGING_DSN')
+        self.copy_format = os.getenv('COPY_FORMAT', 'text')
+        self.copy_chunk_rows = int(os.getenv('COPY_CHUNK_ROWS', '10000'))  # Rows per COPY transaction
+        # --stream engine: 'generator' pulls pages through a generator chain,
+        # 'asyncio' runs fetch, transform and insert as overlapping stages
+        # joined by queues of at most pipeline_queue_pages pages
+        self.pipeline = os.getenv('PIPELINE', 'generator')
+        self.pipeline_queue_pages = int(os.getenv('PIPELINE_QUEUE_PAGES', '4'))
+        # --follow polls every follow_interval seconds while tickets keep
+        # arriving, backing off to follow_max_interval while the source is idle.
+        # Each poll re-reads the last follow_lookback ids, because a SERIAL id
+        # can become visible after higher ids if its transaction commits late.
+        self.follow_interval = float(os.getenv('FOLLOW_INTERVAL', '2'))
+        self.follow_max_interval = float(os.getenv('FOLLOW_MAX_INTERVAL', '30'))
+        self.follow_lookback = int(os.getenv('FOLLOW_LOOKBACK_IDS', '100'))
+        # A poll reads at most follow_poll_rows tickets past its lookback
+        # window, so one that retries a failed batch does not re-read
+        # everything after it
+        self.follow_poll_rows = int(os.getenv('FOLLOW_POLL_ROWS', '10000'))
+        # --shard coordinates workers through leases in this SQLite file
+        self.shard_store = os.getenv('SHARD_STORE', 'pyro_ticket_shards.sqlite')
+        self.shard_lease_seconds = float(os.getenv('SHARD_LEASE_SECONDS', '60'))
+        # 'keyset' pages by primary key cursor, 'offset' uses limit/offset
+        self.pagination = os.getenv('PAGINATION_MODE', 'keyset')
+        
+        # Auth headers are resolved once per project. Staging uses the service
+        # role key when available so RLS does not block inserts.
+        if staging_service_key is None:
+            staging_service_key = os.getenv('STAGING_SERVICE_ROLE_KEY')
+        if not staging_service_key:
+            logger.warning("No STAGING_SERVICE_ROLE_KEY found. RLS might block operations.")
+        self._project_headers = {
+            self.source_url: self._build_headers(source_key),
+            self.staging_url: self._build_headers(staging_service_key or staging_key),
+        }
+        
+        # One keep-alive connection pool per project, created on first use so
+        # the pool can be sized from the final worker count
+        self._sessions: Dict[str, requests.Session] = {}
+        self._rate_limiters: Dict[Optional[str], RateLimiter] = {}
+        self._sessions_lock = threading.Lock()
+
+    @staticmethod
+    def _build_headers(api_key: str) -> Dict[str, str]:
+        """
+        Build the Supabase REST headers for an API key.
+        
+        Args:
+            api_key: Supabase anon or service role key
+            
+        Returns:
+            Request headers
+        """
+        return {
+            'apikey': api_key,
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip',
+            'Prefer': 'return=representation'
+        }
+
+    def _project_for_url(self, url: str) -> Optional[str]:
+        """
+        Return the configured project URL that a request URL belongs to.
+        
+        Args:
+            url: Full URL to request
+            
+        Returns:
+            Project URL, or None if the URL belongs to neither project
+        """
+        for project_url in (self.staging_url, self.source_url):
+            if url == project_url or url.startswith(project_url + '/'):
+                return project_url
+        return None
+
+    def _get_rate_limiter(self, project_url: Optional[str]) -> 'RateLimiter':
+        """
+        Get the rate limiter shared by all requests to a project.
+        
+        Args:
+            project_url: Supabase project URL, or None for other URLs
+            
+        Returns:
+            Rate limiter for the project
+        """
+        limiter = self._rate_limiters.get(project_url)
+        if limiter is not None:
+            return limiter
+        
+        with self._sessions_lock:
+            limiter = self._rate_limiters.get(project_url)
+            if limiter is None:
+                limiter = RateLimiter(self.rate_limit)
+                self._rate_limiters[project_url] = limiter
+        return limiter
+
+    @staticmethod
+    def _is_retryable_status(status: Optional[int]) -> bool:
+        """
+        Decide whether a failed request is worth retrying.
+        
+        Args:
+            status: HTTP status code, or None if no response was received
+            
+        Returns:
+            True for connection errors, timeouts, rate limiting and server errors
+        """
+        return status is None or status in (408, 425, 429) or status >= 500
+
+    def _retry_delay_for(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """
+        Compute how long to wait before the next attempt.
+        
+        Uses the server's Retry-After header when present, otherwise
+        exponential backoff with equal jitter (a random delay between half and
+        all of the backoff) so concurrent workers do not retry in step.
+        
+        Args:
+            attempt: 0-based number of the attempt that failed
+            response: Failed response, if any
+            
+        Returns:
+            Delay in seconds
+        """
+        if response is not None:
+            retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_delay)
+        backoff = min(self.retry_delay * (2 ** attempt), self.max_retry_delay)
+        return random.uniform(backoff / 2, backoff)
+
+    def _endpoint_label(self, url: str, method: str) -> Tuple[str, str, str]:
+        """
+        Describe a request URL for metrics, without its query string.
+        
+        Args:
+            url: Full URL to request
+            method: HTTP method
+            
+        Returns:
+            (project, method, path) where project is source, staging or other
+        """
+        project_url = self._project_for_url(url)
+        project = {self.source_url: 'source', self.staging_url: 'staging'}.get(project_url, 'other')
+        return project, method.upper(), urlsplit(url).path
+
+    def _get_session(self, project_url: str) -> requests.Session:
+        """
+        Get the pooled keep-alive session for a project, creating it on first use.
+        
+        Args:
+            project_url: Supabase project URL
+            
+        Returns:
+            Session with the project's auth headers and a connection pool sized
+            to the number of concurrent workers
+        """
+        session = self._sessions.get(project_url)
+        if session is not None:
+            return session
+        
+        with self._sessions_lock:
+            session = self._sessions.get(project_url)
+            if session is None:
+                pool_size = max(self.workers, self.fetch_workers, 1) * max(self.table_workers, 1)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update(self._project_headers[project_url])
+                self._sessions[project_url] = session
+        return session
+
+    def close(self) -> None:
+        """Close the pooled HTTP sessions."""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _make_request(self, url: str, api_key: str, method: str = 'GET', data: Any = None,
+                      extra_headers: Optional[Dict[str, str]] = None, raw_response: bool = False,
+                      stream: bool = False) -> Any:
+        """
+        Make HTTP request to Supabase REST API.
+        
+        Requests to the source or staging project reuse that project's pooled
+        session and pre-built auth headers; api_key is only used for URLs
+        outside both projects.
+        
+        Every attempt first takes a token from the project's shared rate
+        limiter. Connection errors, 408, 425, 429 and 5xx responses are retried
+        with jittered exponential backoff, or after the server's Retry-After on
+        429/503, which also pauses every other worker using the same project.
+        Other 4xx responses fail immediately.
+        
+        The body is serialized once, before the first attempt, and responses
+        are decoded with json_loads.
+        
+        Args:
+            url: Full URL to request
+            api_key: Supabase anon key
+            method: HTTP method
+            data: Request data (for POST/PUT), or an already serialized JSON body
+            extra_headers: Headers to add or override for this request only
+            raw_response: If True, return the response object instead of its data
+            stream: If True, return the response unread so the caller can
+                parse the body as it arrives (implies raw_response)
+            
+        Returns:
+            Response data
+            
+        Raises:
+            SupabaseRequestError: If request fails
+        """
+        if method.upper() not in ('GET', 'POST', 'PUT'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        project_url = self._project_for_url(url)
+        if project_url is not None:
+            session = self._get_session(project_url)
+            headers = None
+        else:
+            session = requests
+            headers = self._build_headers(api_key)
+        if extra_headers:
+            headers = {**(headers or {}), **extra_headers}
+        
+        endpoint = self._endpoint_label(url, method)
+        limiter = self._get_rate_limiter(project_url)
+        body = data if data is None or isinstance(data, bytes) else json_dumps_bytes(data)
+        
+        for attempt in range(self.max_retries):
+            limiter.acquire()
+            started = time.perf_counter()
+            response = None
+            try:
+                response = session.request(method.upper(), url, headers=headers, data=body, timeout=30,
+                                           stream=stream)
+                received = (int(response.headers.get('Content-Length') or 0) if stream and response.ok
+                            else len(response.content))
+                self.metrics.observe_request(endpoint, time.perf_counter() - started, response.status_code,
+                                             len(body or b''), received)
+                
+                response.raise_for_status()
+                limiter.record_success()
+                
+                if raw_response or stream:
+                    return response
+                
+                # Handle empty responses
+                if response.status_code == 204 or not response.content:
+                    return None
+                
+                try:
+                    return json_loads(response.content)
+                except ValueError as e:
+                    raise SupabaseRequestError(f"Invalid JSON in response: {e}", response) from e
+                
+            except requests.exceptions.RequestException as e:
+                if response is None:
+                    self.metrics.observe_request(endpoint, time.perf_counter() - started, 0, 0, 0)
+                status = response.status_code if response is not None else None
+                
+                if not self._is_retryable_status(status):
+                    # Validation and auth errors will fail the same way again
+                    logger.warning(f"Request failed with non-retryable status {status}: {e}")
+                    raise SupabaseRequestError(f"Request failed with status {status}: {e}", response) from e
+                
+                logger.warning(f"Request attempt {attempt + 1} failed: {e}")
+                if attempt >= self.max_retries - 1:
+                    raise SupabaseRequestError(f"Request failed after {self.max_retries} attempts: {e}",
+                                               response) from e
+                
+                self.metrics.record_retry(endpoint)
+                delay = self._retry_delay_for(attempt, response)
+                if status in (429, 503):
+                    # Throttle every worker talking to this project, not just this one
+                    limiter.throttle(delay)
+                else:
+                    time.sleep(delay)
+
+    def _iter_pages(self, project_url: str, api_key: str, label: str, limit: int = None,
+                    select: str = '*', after_id: Optional[int] = None,
+                    max_id: Optional[int] = None, table: str = 'support_ticket',
+                    key: str = 'id') -> Iterator[List[Dict[str, Any]]]:
+        """
+        Page through a table of a Supabase project, support_ticket by default.
+        
+        In keyset mode (the default) each page is requested with
+        ``order=id.asc&id=gt.<last_id>`` so Postgres seeks straight to the next
+        page through the primary key index instead of scanning and discarding
+        ``offset`` rows. Because ``id`` is a SERIAL, rows inserted while the copy
+        is running always sort after the cursor and are never skipped or
+        returned twice. Offset mode is kept for comparison and debugging.
+        Large pages may be yielded in several chunks, see _iter_response_pages.
+        A page_size above the server's max-rows limit is lowered to it.
+        
+        Args:
+            project_url: Supabase project URL
+            api_key: Supabase anon key
+            label: Human readable name of the project used in log lines
+            limit: Maximum number of tickets to fetch (None for all tickets)
+            select: PostgREST select expression (must include id in keyset mode)
+            after_id: Only fetch tickets with an id greater than this
+            max_id: Only fetch tickets with an id less than or equal to this
+            table: Table to page through
+            key: Unique column to order and page by in place of id
+            
+        Yields:
+            Pages of ticket data
+        """
+        fetched = 0
+        offset = 0
+        last_id = after_id
+        page_size = self.page_size
+        page_size_probed = False
+        stage = f"fetch_{self._endpoint_label(project_url, 'GET')[0]}"
+        
+        while True:
+            if limit and fetched >= limit:
+                break
+                
+            current_limit = min(page_size, limit - fetched if limit else page_size)
+            url = f"{project_url}/rest/v1/{table}?select={select}&limit={current_limit}"
+            if self.pagination == 'keyset':
+                url += f"&order={key}.asc"
+                if last_id is not None:
+                    url += f"&{key}=gt.{quote(str(last_id), safe='')}"
+            else:
+                url += f"&offset={offset}"
+                if after_id is not None:
+                    url += f"&{key}=gt.{quote(str(after_id), safe='')}"
+            if max_id is not None:
+                url += f"&{key}=lte.{max_id}"
+            
+            try:
+                received = 0
+                for data in self._iter_response_pages(url, api_key, stage, current_limit):
+                    received += len(data)
+                    fetched += len(data)
+                    if self.pagination == 'keyset':
+                        logger.info(f"Fetched {len(data)} tickets from {label} (after id: {last_id})")
+                        last_id = data[-1][key]
+                    else:
+                        logger.info(f"Fetched {len(data)} tickets from {label} (offset: {offset})")
+                    
+                    yield data
+                
+                if received < current_limit:
+                    if not received or page_size_probed:
+                        break  # No more data
+                    # PostgREST's max-rows setting (1000 on hosted Supabase)
+                    # cuts larger pages short, so a short page is only the end
+                    # if the next one is empty. Page by what the server returned.
+                    page_size = received
+                    page_size_probed = True
+                    
+                offset += received
+                
+            except Exception as e:
+                logger.error(f"Failed to fetch tickets from {label}: {e}")
+                break
+        
+        logger.info(f"Total fetched: {fetched} tickets from {label}")
+
+    def _iter_response_pages(self, url: str, api_key: str, stage: str,
+                             expected_rows: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch one page of rows, parsing large pages as they arrive.
+        
+        When ijson is installed and the page may hold more than
+        json_chunk_rows rows, the response body is parsed incrementally and
+        handed on in chunks of json_chunk_rows, so the whole page is never
+        held as raw bytes and decoded rows at once. Otherwise the page is
+        decoded in one go.
+        
+        Args:
+            url: Page URL
+            api_key: Supabase anon key
+            stage: Metrics stage to record fetch time under
+            expected_rows: Row limit of the request
+            
+        Yields:
+            Non-empty lists of rows
+        """
+        started = time.perf_counter()
+        if ijson is None or expected_rows <= self.json_chunk_rows:
+            data = self._make_request(url, api_key, 'GET')
+            self.metrics.record_stage(stage, time.perf_counter() - started, len(data or []))
+            if data:
+                yield data
+            return
+        
+        response = self._make_request(url, api_key, 'GET', stream=True)
+        try:
+            response.raw.decode_content = True
+            rows = ijson.items(response.raw, 'item', use_float=True)
+            while True:
+                chunk = list(islice(rows, self.json_chunk_rows))
+                self.metrics.record_stage(stage, time.perf_counter() - started, len(chunk))
+                if not chunk:
+                    return
+                yield chunk
+                started = time.perf_counter()
+        finally:
+            response.close()
+
+    def fetch_tickets_from_source(self, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Fetch tickets from source Supabase project.
+        
+        Args:
+            limit: Maximum number of tickets to fetch (None for all tickets)
+            
+        Returns:
+            List of ticket data
+        """
+        all_tickets = []
+        for page in self.iter_tickets_from_source(limit):
+            all_tickets.extend(page)
+        return all_tickets
+
+    def fetch_tickets_from_staging(self, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Fetch tickets from staging Supabase project.
+        
+        Args:
+            limit: Maximum number of tickets to fetch (None for all tickets)
+            
+        Returns:
+            List of ticket data
+        """
+        all_tickets = []
+        for page in self._iter_pages(self.staging_url, self.staging_key, 'staging', limit):
+            all_tickets.extend(page)
+        return all_tickets
+
+    def _get_id_bounds(self, project_url: str, api_key: str,
+                       after_id: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """
+        Get the smallest and largest ticket id of a project.
+        
+        Args:
+            project_url: Supabase project URL
+            api_key: Supabase anon key
+            after_id: Only consider tickets with an id greater than this
+            
+        Returns:
+            (min_id, max_id), or None if there are no tickets
+        """
+        base_url = f"{project_url}/rest/v1/support_ticket?select=id&limit=1"
+        if after_id is not None:
+            base_url += f"&id=gt.{after_id}"
+        
+        first = self._make_request(f"{base_url}&order=id.asc", api_key, 'GET')
+        last = self._make_request(f"{base_url}&order=id.desc", api_key, 'GET')
+        if not first or not last:
+            return None
+        return first[0]['id'], last[0]['id']
+
+    def _iter_pages_partitioned(self, project_url: str, api_key: str, label: str, limit: int = None,
+                                select: str = '*', after_id: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Page through the support_ticket table with one concurrent cursor per id range.
+        
+        The id space between the current min and max id is split into
+        fetch_workers equal ranges. Each range is paged by its own thread and
+        pages are merged into a bounded queue as they arrive, so pages come out
+        in no particular order. Tickets created after the bounds were read are
+        left for the next run.
+        
+        Args:
+            project_url: Supabase project URL
+            api_key: Supabase anon key
+            label: Human readable name of the project used in log lines
+            limit: Maximum number of tickets to fetch (None for all tickets)
+            select: PostgREST select expression
+            after_id: Only fetch tickets with an id greater than this
+            
+        Yields:
+            Pages of ticket data
+        """
+        try:
+            bounds = self._get_id_bounds(project_url, api_key, after_id)
+        except Exception as e:
+            logger.error(f"Failed to read id bounds from {label}: {e}")
+            return
+        if bounds is None:
+            logger.info(f"Total fetched: 0 tickets from {label}")
+            return
+        
+        min_id, max_id = bounds
+        range_count = max(1, min(self.fetch_workers, max_id - min_id + 1))
+        step = (max_id - min_id + 1 + range_count - 1) // range_count
+        ranges = []
+        lower = min_id - 1
+        while lower < max_id:
+            upper = min(lower + step, max_id)
+            ranges.append((lower, upper))
+            lower = upper
+        logger.info(f"Fetching ids {min_id}-{max_id} from {label} in {len(ranges)} parallel ranges")
+        
+        pages: queue.Queue = queue.Queue(maxsize=len(ranges) * 2)
+        stop = threading.Event()
+        done_marker = object()
+        
+        def fetch_range(range_after: int, range_max: int) -> None:
+            range_label = f"{label} ids {range_after + 1}-{range_max}"
+            try:
+                for page in self._iter_pages(project_url, api_key, range_label, None, select,
+                                             after_id=range_after, max_id=range_max):
+                    while not stop.is_set():
+                        try:
+                            pages.put(page, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+            finally:
+                pages.put(done_marker)
+        
+        threads = [
+            threading.Thread(target=fetch_range, args=(range_after, range_max),
+                             name=f'fetch-{i}', daemon=True)
+            for i, (range_after, range_max) in enumerate(ranges)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        fetched = 0
+        remaining = len(threads)
+        try:
+            while remaining:
+                page = pages.get()
+                if page is done_marker:
+                    remaining -= 1
+                    continue
+                if limit and fetched + len(page) >= limit:
+                    yield page[:limit - fetched]
+                    fetched = limit
+                    break
+                fetched += len(page)
+                yield page
+        finally:
+            stop.set()
+            # Unblock producers waiting on a full queue so they can exit
+            while remaining:
+                if pages.get() is done_marker:
+                    remaining -= 1
+        
+        logger.info(f"Total fetched: {fetched} tickets from {label}")
+
+    def iter_tickets_from_source(self, limit: int = None, select: str = '*',
+                                 after_id: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream tickets from source Supabase project one page at a time.
+        
+        With more than one fetch worker the id space is read as concurrent
+        ranges and pages are no longer in id order.
+        
+        Args:
+            limit: Maximum number of tickets to fetch (None for all tickets)
+            select: PostgREST select expression
+            after_id: Only fetch tickets with an id greater than this
+            
+        Yields:
+            Pages of ticket data
+        """
+        if self.from_snapshot:
+            return SnapshotReader(self.from_snapshot).iter_pages(self.page_size, limit, select, after_id)
+        
+        if self.fetch_workers > 1:
+            pages = self._iter_pages_partitioned(self.source_url, self.source_key, 'source', limit, select, after_id)
+        else:
+            pages = self._iter_pages(self.source_url, self.source_key, 'source', limit, select, after_id)
+        
+        if self.snapshot_dir and select == '*':
+            return self._tee_to_snapshot(pages)
+        return pages
+
+    def _tee_to_snapshot(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Pass source pages through while writing them to snapshot_dir.
+        
+        Args:
+            pages: Pages of raw ticket data from source
+            
+        Yields:
+            The same pages
+        """
+        writer = SnapshotWriter(self.snapshot_dir, self.source_url, self.snapshot_segment_rows)
+        try:
+            for page in pages:
+                writer.write_page(page)
+                yield page
+        finally:
+            writer.close()
+
+    def _source_is_ordered(self) -> bool:
+        """
+        Check whether source pages arrive in ascending id order without overlap.
+        
+        Returns:
+            True for keyset pagination from a single cursor or an ordered snapshot
+        """
+        if self.from_snapshot:
+            return SnapshotReader(self.from_snapshot).ordered
+        return self.pagination == 'keyset' and self.fetch_workers <= 1
+
+    def iter_source_tickets_by_ids(self, ids: array) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream full source tickets for a sorted array of IDs.
+        
+        Args:
+            ids: Sorted ticket IDs to fetch
+            
+        Yields:
+            Pages of ticket data
+        """
+        if self.from_snapshot:
+            return SnapshotReader(self.from_snapshot).iter_pages(self.page_size, ids=ids)
+        return self.iter_tickets_by_ids(self.source_url, self.source_key, 'source', ids)
+
+    def iter_tickets_from_staging(self, limit: int = None, select: str = '*') -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream tickets from staging Supabase project one page at a time.
+        
+        Args:
+            limit: Maximum number of tickets to fetch (None for all tickets)
+            select: PostgREST select expression
+            
+        Yields:
+            Pages of ticket data
+        """
+        return self._iter_pages(self.staging_url, self.staging_key, 'staging', limit, select)
+
+    @staticmethod
+    def _collect_ids(pages: Iterable[List[Dict[str, Any]]], ordered: bool) -> array:
+        """
+        Collect ticket IDs from pages into a compact sorted array.
+        
+        Args:
+            pages: Pages of tickets selected with at least the id column
+            ordered: True if the pages arrive in ascending id order without overlap
+            
+        Returns:
+            Sorted array of ticket IDs
+        """
+        ids = array('q')
+        for page in pages:
+            ids.extend(ticket['id'] for ticket in page)
+        
+        if not ordered:
+            # Offset or partitioned pages have no guaranteed order and may overlap
+            ids = array('q', sorted(set(ids)))
+        return ids
+
+    def fetch_ticket_ids_from_source(self, limit: int = None) -> array:
+        """
+        Fetch ticket IDs from source Supabase project.
+        
+        Args:
+            limit: Maximum number of IDs to fetch (None for all tickets)
+            
+        Returns:
+            Sorted array of ticket IDs
+        """
+        pages = self.iter_tickets_from_source(limit, select='id')
+        return self._collect_ids(pages, self._source_is_ordered())
+
+    def fetch_ticket_ids_from_staging(self, limit: int = None) -> array:
+        """
+        Fetch ticket IDs from staging Supabase project.
+        
+        Args:
+            limit: Maximum number of IDs to fetch (None for all tickets)
+            
+        Returns:
+            Sorted array of ticket IDs
+        """
+        pages = self.iter_tickets_from_staging(limit, select='id')
+        return self._collect_ids(pages, self.pagination == 'keyset')
+
+    def iter_tickets_by_ids(self, project_url: str, api_key: str, label: str,
+                            ids: array) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch full ticket rows for a list of IDs, batched with ``id=in.(...)``.
+        
+        Args:
+            project_url: Supabase project URL
+            api_key: Supabase anon key
+            label: Human readable name of the project used in log lines
+            ids: Ticket IDs to fetch
+            
+        Yields:
+            Pages of ticket data
+        """
+        stage = f"fetch_{self._endpoint_label(project_url, 'GET')[0]}"
+        for i in range(0, len(ids), self.id_batch_size):
+            chunk = ids[i:i + self.id_batch_size]
+            id_list = ','.join(str(ticket_id) for ticket_id in chunk)
+            url = f"{project_url}/rest/v1/support_ticket?select=*&order=id.asc&id=in.({id_list})"
+            
+            try:
+                started = time.perf_counter()
+                data = self._make_request(url, api_key, 'GET')
+                self.metrics.record_stage(stage, time.perf_counter() - started, len(data or []))
+            except Exception as e:
+                logger.error(f"Failed to fetch tickets by id from {label}: {e}")
+                continue
+            
+            logger.info(f"Fetched {len(data or [])}/{len(chunk)} tickets by id from {label}")
+            if data:
+                yield data
+
+    def find_missing_tickets(self, source_tickets: List[Dict[str, Any]], staging_tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Find tickets that exist in source but not in staging.
+        
+        Args:
+            source_tickets: List of tickets from source
+            staging_tickets: List of tickets from staging
+            
+        Returns:
+            List of tickets that need to be copied
+        """
+        # Create sets of ticket IDs for comparison
+        source_ids = {ticket.get('id') for ticket in source_tickets if ticket.get('id')}
+        staging_ids = {ticket.get('id') for ticket in staging_tickets if ticket.get('id')}
+        
+        # Find missing IDs
+        missing_ids = source_ids - staging_ids
+        
+        # Get the full ticket data for missing tickets
+        missing_tickets = [ticket for ticket in source_tickets if ticket.get('id') in missing_ids]
+        
+        logger.info(f"Missing tickets: {len(missing_tickets)}")
+        
+        return missing_tickets
+
+    def _get_transform(self) -> Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Get the compiled support_ticket transform for the current settings.
+        
+        The transform is compiled once and only rebuilt if staging_tenant_id
+        changes.
+        
+        Returns:
+            Page transform function
+        """
+        params = {'staging_tenant_id': self.staging_tenant_id}
+        if self._transform is None or self._transform_params != params:
+            self._transform = compile_transform(SUPPORT_TICKET_TRANSFORM, params)
+            self._transform_params = params
+        return self._transform
+
+    def transform_ticket_data(self, tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Transform ticket data for staging environment.
+        
+        Args:
+            tickets: Raw ticket data from source
+            
+        Returns:
+            Transformed ticket data for staging
+        """
+        started = time.perf_counter()
+        transformed_tickets = self._get_transform()(tickets)
+        elapsed = time.perf_counter() - started
+        self.metrics.record_stage('transform', elapsed, len(transformed_tickets))
+        
+        rate = f", {len(tickets) / elapsed:,.0f} tickets/s" if elapsed > 0 else ""
+        logger.info(f"Transformed {len(transformed_tickets)} tickets in {elapsed * 1000:.1f} ms{rate}")
+        return transformed_tickets
+
+    def iter_transformed_tickets(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Transform a stream of ticket pages for staging environment.
+        
+        Args:
+            pages: Pages of raw ticket data from source
+            
+        Yields:
+            Pages of transformed ticket data
+        """
+        for page in pages:
+            yield self.transform_ticket_data(page)
+
+    def _iter_batches(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Re-chunk a stream of ticket pages into insert batches of batch_size.
+        
+        With adaptive batching the batch size is managed by an AdaptiveBatcher
+        instead, starting at adaptive_batch_size.
+        
+        Args:
+            pages: Pages of transformed ticket data
+            
+        Yields:
+            Batches of at most batch_size tickets
+        """
+        if self.adaptive_batching:
+            self._batcher = AdaptiveBatcher(self.adaptive_batch_size, self.max_batch_size)
+            yield from self._batcher.batches(pages)
+            return
+        
+        batch = []
+        for page in pages:
+            for ticket in page:
+                batch.append(ticket)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _get_next_available_id(self) -> int:
+        """
+        Get the next available ID from the staging support_ticket table.
+        
+        Returns:
+            Next available ID
+        """
+        try:
+            url = f"{self.staging_url}/rest/v1/support_ticket?select=id&order=id.desc&limit=1"
+            data = self._make_request(url, self.staging_key, 'GET')
+            
+            if data and len(data) > 0:
+                max_id = data[0].get('id', 0)
+                return max_id + 1
+            else:
+                return 1  # Start from 1 if table is empty
+                
+        except Exception as e:
+            logger.warning(f"Failed to get next ID, using fallback: {e}")
+            return 1000000  # Use a high number as fallback
+
+    def _test_staging_access(self, table: str = 'support_ticket') -> bool:
+        """
+        Check that a staging table is reachable before inserting.
+        
+        Args:
+            table: Table to check
+            
+        Returns:
+            True if the table could be read
+        """
+        url = f"{self.staging_url}/rest/v1/{table}"
+        try:
+            test_response = self._make_request(f"{url}?limit=1", self.staging_key, 'GET')
+            logger.info(f"Table access test successful: {len(test_response) if test_response else 0} records found")
+            return True
+        except Exception as e:
+            logger.error(f"Table access test failed: {e}")
+            return False
+
+    def _insert_url(self, table: str = 'support_ticket', key: str = 'id') -> str:
+        """
+        Return the staging endpoint used for inserts into a table.
+        
+        Args:
+            table: Table to insert into
+            key: Unique column upserts resolve conflicts on
+            
+        Returns:
+            Insert URL, with ``on_conflict=<key>`` in upsert mode
+        """
+        url = f"{self.staging_url}/rest/v1/{table}"
+        if self.upsert:
+            url += f"?on_conflict={key}"
+        return url
+
+    def _insert_prefer_header(self) -> str:
+        """
+        Build the Prefer header for inserts.
+        
+        Inserts ask for ``return=minimal`` so staging does not echo the rows
+        back, and ``count=exact`` so the inserted row count still comes back in
+        the Content-Range header.
+        
+        Returns:
+            Prefer header value
+        """
+        prefer = ['return=minimal', 'count=exact']
+        if self.upsert == 'merge':
+            prefer.append('resolution=merge-duplicates')
+        elif self.upsert == 'ignore':
+            prefer.append('resolution=ignore-duplicates')
+        return ','.join(prefer)
+
+    @staticmethod
+    def _content_range_total(response: requests.Response) -> Optional[int]:
+        """
+        Read the row count from a PostgREST Content-Range header (e.g. ``*/42``).
+        
+        Args:
+            response: Response to a request sent with ``Prefer: count=exact``
+            
+        Returns:
+            Row count, or None if the header is missing or has no count
+        """
+        content_range = response.headers.get('Content-Range', '')
+        total = content_range.rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+
+    @staticmethod
+    def _batch_columns(batch: List[Dict[str, Any]]) -> Optional[List[str]]:
+        """
+        Return the columns of a batch whose rows do not all have the same keys.
+        
+        Args:
+            batch: Rows to insert
+            
+        Returns:
+            Union of the row keys in first-seen order, or None if every row
+            has the same keys
+        """
+        if not batch:
+            return None
+        first_keys = batch[0].keys()
+        if all(row.keys() == first_keys for row in batch):
+            return None
+        columns: Dict[str, None] = {}
+        for row in batch:
+            columns.update(dict.fromkeys(row))
+        return list(columns)
+
+    def _post_batch(self, url: str, batch: List[Dict[str, Any]]) -> int:
+        """
+        POST a batch of transformed tickets to staging.
+        
+        The transform leaves out null copy fields, so rows in a batch can have
+        different keys. PostgREST rejects such a bulk insert (PGRST102) unless
+        it is told the columns, so mixed batches are sent with
+        ``columns=<union of the keys>`` and ``Prefer: missing=default``; a field
+        a row leaves out then takes the column default, on upserts as well.
+        
+        Args:
+            url: Insert URL of the staging project
+            batch: Transformed tickets to insert
+            
+        Returns:
+            Number of inserted tickets
+            
+        Raises:
+            SupabaseRequestError: If the request fails
+        """
+        started = time.perf_counter()
+        body = json_dumps_bytes(batch)
+        self.metrics.record_stage('serialize', time.perf_counter() - started, len(batch))
+        
+        prefer = self._insert_prefer_header()
+        columns = self._batch_columns(batch)
+        if columns is not None:
+            separator = '&' if '?' in url else '?'
+            url = f"{url}{separator}columns={quote(','.join(columns), safe=',')}"
+            prefer += ',missing=default'
+        
+        response = self._make_request(url, self.staging_key, 'POST', body,
+                                      extra_headers={'Prefer': prefer},
+                                      raw_response=True)
+        inserted_count = self._content_range_total(response)
+        if inserted_count is None:
+            inserted_count = len(batch)
+        return inserted_count
+
+    def _bisect_batch(self, url: str, batch: List[Dict[str, Any]], batch_num: int,
+                      error: SupabaseRequestError) -> Optional[int]:
+        """
+        Isolate the rows that made staging reject a batch.
+        
+        The batch is split in half and each half retried, recursively, until
+        the rejected rows are on their own; those are written to the reject
+        file and the rest of the batch is inserted.
+        
+        Args:
+            url: Insert URL of the staging project
+            batch: Transformed tickets that were rejected together
+            batch_num: 1-based batch number, used for logging
+            error: The data error the batch failed with
+            
+        Returns:
+            Number of inserted tickets, or None if a half failed for another reason
+        """
+        if len(batch) == 1:
+            self._write_reject(batch[0], error)
+            return 0
+        
+        logger.warning(f"Batch {batch_num}: {len(batch)} tickets rejected with status {error.status_code}, splitting")
+        
+        mid = len(batch) // 2
+        inserted_count = 0
+        for half in (batch[:mid], batch[mid:]):
+            try:
+                inserted_count += self._post_batch(url, half)
+            except SupabaseRequestError as e:
+                if not e.is_data_error:
+                    logger.error(f"Failed to insert part of batch {batch_num}: {e}")
+                    return None
+                half_count = self._bisect_batch(url, half, batch_num, e)
+                if half_count is None:
+                    return None
+                inserted_count += half_count
+        return inserted_count
+
+    def _write_reject(self, ticket: Dict[str, Any], error: SupabaseRequestError) -> None:
+        """
+        Append a ticket staging refused to insert to the reject file.
+        
+        Args:
+            ticket: Transformed ticket
+            error: The error staging returned for it
+        """
+        detail = None
+        if error.response is not None:
+            try:
+                detail = error.response.json()
+            except ValueError:
+                detail = error.response.text
+        
+        record = {
+            'id': ticket.get('id'),
+            'status': error.status_code,
+            'error': detail,
+            'rejected_at': datetime.now(timezone.utc).isoformat(),
+            'ticket': ticket,
+        }
+        logger.error(f"Rejected ticket {ticket.get('id')} (status {error.status_code}): {detail}")
+        with self._reject_lock:
+            with open(self.reject_file, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+
+    def _insert_batch(self, url: str, batch: List[Dict[str, Any]], batch_num: int,
+                      total_batches: Any = '?') -> Optional[int]:
+        """
+        Insert a single batch of transformed tickets into staging.
+        
+        Failures are logged rather than raised so the remaining batches still
+        get a chance to go through.
+        
+        Args:
+            url: support_ticket REST endpoint of the staging project
+            batch: Transformed tickets to insert
+            batch_num: 1-based batch number, used for logging
+            total_batches: Total number of batches if known, used for logging
+            
+        Returns:
+            Number of successfully inserted tickets, or None if the batch failed
+        """
+        logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} tickets)")
+        
+        started = time.perf_counter()
+        try:
+            # Log the first ticket in the batch for debugging
+            if batch_num == 1 and len(batch) > 0:
+                logger.info(f"Sample ticket data being inserted: {json.dumps(batch[0], indent=2, default=str)}")
+            
+            inserted_count = self._post_batch(url, batch)
+            self.metrics.record_stage('insert', time.perf_counter() - started, inserted_count)
+            if self.adaptive_batching:
+                self._batcher.record_success()
+            
+            logger.info(f"Batch {batch_num}: Inserted {inserted_count}/{len(batch)} tickets")
+            return inserted_count
+            
+        except Exception as e:
+            if ((self.adaptive_batching or self._bisect_rejects)
+                    and isinstance(e, SupabaseRequestError) and e.is_data_error):
+                if self.adaptive_batching:
+                    self._batcher.record_failure(len(batch))
+                inserted_count = self._bisect_batch(url, batch, batch_num, e)
+                if inserted_count is not None:
+                    self.metrics.record_stage('insert', time.perf_counter() - started, inserted_count)
+                    logger.info(f"Batch {batch_num}: Inserted {inserted_count}/{len(batch)} tickets after bisection")
+                    return inserted_count
+            
+            logger.error(f"Failed to insert batch {batch_num}: {e}")
+            # Log the error response if available
+            if hasattr(e, 'response') and e.response is not None:
+                logger.error(f"Response status: {e.response.status_code}")
+                logger.error(f"Response headers: {dict(e.response.headers)}")
+                try:
+                    error_detail = e.response.json()
+                    logger.error(f"Error details: {json.dumps(error_detail, indent=2)}")
+                except Exception as json_error:
+                    logger.error(f"Error response text: {e.response.text}")
+                    logger.error(f"JSON parse error: {json_error}")
+            # Also log the actual data being sent for debugging
+            if batch_num == 1 and len(batch) > 0:
+                logger.error(f"Failed data sample: {json.dumps(batch[0], indent=2, default=str)}")
+            return None
+
+    def _insert_batches(self, url: str, batches: Iterable[List[Dict[str, Any]]], total_batches: Any = '?',
+                        on_batch_done: Optional[Callable[[int, List[Dict[str, Any]], Optional[int]], None]] = None) -> Dict[str, int]:
+        """
+        Insert batches into staging, concurrently when more than one worker is configured.
+        
+        With several workers the batches are handed to a thread pool with at
+        most two batches per worker in flight, so a streamed input is still
+        consumed lazily. Each batch reports and logs its own result.
+        
+        Args:
+            url: support_ticket REST endpoint of the staging project
+            batches: Batches of transformed tickets
+            total_batches: Total number of batches if known, used for logging
+            on_batch_done: Optional callback invoked with the batch number, the
+                batch and its inserted count (None if it failed) as each batch
+                completes, possibly out of order and from a worker thread
+            
+        Returns:
+            Dictionary with the number of tickets seen and inserted
+        """
+        def insert(batch_num: int, batch: List[Dict[str, Any]]) -> int:
+            inserted_count = self._insert_batch(url, batch, batch_num, total_batches)
+            if on_batch_done is not None:
+                on_batch_done(batch_num, batch, inserted_count)
+            return inserted_count or 0
+        
+        total_tickets = 0
+        total_inserted = 0
+        
+        if self.workers <= 1:
+            for batch_num, batch in enumerate(batches, start=1):
+                total_tickets += len(batch)
+                total_inserted += insert(batch_num, batch)
+            return {"ticket_count": total_tickets, "inserted_count": total_inserted}
+        
+        max_in_flight = self.workers * 2
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='insert') as executor:
+            pending = set()
+            for batch_num, batch in enumerate(batches, start=1):
+                total_tickets += len(batch)
+                pending.add(executor.submit(insert, batch_num, batch))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    total_inserted += sum(future.result() for future in done)
+            
+            done, _ = wait(pending)
+            total_inserted += sum(future.result() for future in done)
+        
+        return {"ticket_count": total_tickets, "inserted_count": total_inserted}
+
+    def insert_tickets_to_staging(self, tickets: List[Dict[str, Any]]) -> int:
+        """
+        Insert transformed tickets into staging support_ticket table.
+        
+        Uses the REST API, or Postgres COPY when insert_backend is 'copy'.
+        
+        Args:
+            tickets: List of transformed tickets
+            
+        Returns:
+            Number of successfully inserted tickets
+        """
+        if self.insert_backend == 'copy':
+            return self._insert_with_copy([tickets])["inserted_count"]
+        
+        url = self._insert_url()
+        
+        # First, test if we can access the table
+        if not self._test_staging_access():
+            return 0
+        
+        if self.adaptive_batching:
+            total_batches = '?'
+            batches = self._iter_batches([tickets])
+        else:
+            total_batches = (len(tickets) + self.batch_size - 1) // self.batch_size
+            batches = (tickets[i:i + self.batch_size] for i in range(0, len(tickets), self.batch_size))
+        total_inserted = self._insert_batches(url, batches, total_batches)["inserted_count"]
+        
+        logger.info(f"Total inserted: {total_inserted}/{len(tickets)} tickets")
+        return total_inserted
+
+    def insert_ticket_stream(self, pages: Iterable[List[Dict[str, Any]]],
+                             on_batch_done: Optional[Callable[[int, List[Dict[str, Any]], Optional[int]], None]] = None) -> Dict[str, int]:
+        """
+        Insert a stream of transformed ticket pages into staging.
+        
+        Batches are cut from the stream as pages arrive, so the first inserts
+        go out before later pages have been fetched and only one page plus one
+        batch is held in memory at a time. With the 'copy' insert backend the
+        pages are bulk-loaded with Postgres COPY instead.
+        
+        Args:
+            pages: Pages of transformed tickets
+            on_batch_done: Optional per-batch completion callback, see
+                _insert_batches (REST backend only)
+            
+        Returns:
+            Dictionary with the number of tickets seen and inserted
+        """
+        if self.insert_backend == 'copy':
+            return self._insert_with_copy(pages)
+        
+        url = self._insert_url()
+        
+        if not self._test_staging_access():
+            return {"ticket_count": 0, "inserted_count": 0}
+        
+        result = self._insert_batches(url, self._iter_batches(pages), on_batch_done=on_batch_done)
+        
+        logger.info(f"Total inserted: {result['inserted_count']}/{result['ticket_count']} tickets")
+        return result
+
+    def _require_rest_backend(self, mode: str) -> None:
+        """
+        Refuse the COPY insert backend in a mode that only inserts through the REST API.
+        
+        Args:
+            mode: Name of the mode, used in the error message
+            
+        Raises:
+            ValueError: If insert_backend is 'copy'
+        """
+        if self.insert_backend == 'copy':
+            raise ValueError(f"{mode} inserts through the REST API and does not support the COPY insert backend")
+
+    def _insert_with_copy(self, pages: Iterable[List[Dict[str, Any]]]) -> Dict[str, int]:
+        """
+        Bulk-load transformed ticket pages into staging with Postgres COPY.
+        
+        Pages are regrouped into chunks of copy_chunk_rows, each loaded and
+        committed in one transaction; a failed chunk is logged and skipped
+        like a failed REST batch. The id sequence is moved past the copied
+        ids afterwards.
+        
+        Args:
+            pages: Pages of transformed tickets
+            
+        Returns:
+            Dictionary with the number of tickets seen and inserted
+        """
+        if not self.staging_dsn:
+            raise ValueError("The COPY insert backend needs a staging database DSN (--staging-dsn or STAGING_DSN)")
+        
+        loader = PostgresCopyLoader(self.staging_dsn, copy_format=self.copy_format, upsert=self.upsert)
+        total_tickets = 0
+        total_inserted = 0
+        
+        def load(chunk_num: int, chunk: List[Dict[str, Any]]) -> int:
+            started = time.perf_counter()
+            try:
+                inserted_count = loader.load(chunk)
+            except (psycopg.Error, ValueError) as e:
+                logger.error(f"Failed to COPY chunk {chunk_num} ({len(chunk)} tickets): {e}")
+                return 0
+            elapsed = time.perf_counter() - started
+            self.metrics.record_stage('insert', elapsed, inserted_count)
+            rate = f", {inserted_count / elapsed:,.0f} tickets/s" if elapsed > 0 else ""
+            logger.info(f"Chunk {chunk_num}: Copied {inserted_count}/{len(chunk)} tickets{rate}")
+            return inserted_count
+        
+        try:
+            chunk: List[Dict[str, Any]] = []
+            chunk_num = 0
+            for page in pages:
+                chunk.extend(page)
+                if len(chunk) >= self.copy_chunk_rows:
+                    chunk_num += 1
+                    total_tickets += len(chunk)
+                    total_inserted += load(chunk_num, chunk)
+                    chunk = []
+            if chunk:
+                total_tickets += len(chunk)
+                total_inserted += load(chunk_num + 1, chunk)
+            
+            if total_inserted:
+                loader.fix_sequence()
+        finally:
+            loader.close()
+        
+        logger.info(f"Total inserted: {total_inserted}/{total_tickets} tickets")
+        return {"ticket_count": total_tickets, "inserted_count": total_inserted}
+
+    def copy_tickets(self, limit: int = 1000, check_missing: bool = False, stream: bool = False,
+                     incremental: bool = False, reconcile: bool = False) -> Dict[str, Any]:
+        """
+        Main method to copy support tickets from source to staging.
+        
+        Metrics for the run are collected in self.metrics and written to
+        report_json / report_prometheus when those are set.
+        
+        Args:
+            limit: Maximum number of tickets to copy
+            check_missing: If True, only copy tickets that don't exist in staging
+            stream: If True, fetch, transform and insert page by page with bounded memory
+            incremental: If True, only copy tickets past the checkpoint in state_file
+            reconcile: If True, upsert only tickets that are missing or differ in staging
+            
+        Returns:
+            Summary of the copy operation
+        """
+        self.metrics = CopyMetrics()
+        self.metrics.start_progress(self.progress_interval)
+        result = {"success": False, "message": "Copy did not complete"}
+        try:
+            result = self._copy_tickets(limit, check_missing, stream, incremental, reconcile)
+            return result
+        finally:
+            self.metrics.finish(result)
+            self._write_reports()
+
+    def _write_reports(self) -> None:
+        """Write the run report files that were requested, without failing the run."""
+        try:
+            if self.report_json:
+                self.metrics.write_json(self.report_json)
+            if self.report_prometheus:
+                self.metrics.write_prometheus(self.report_prometheus)
+        except OSError as e:
+            logger.error(f"Failed to write run report: {e}")
+
+    def _copy_tickets(self, limit: int, check_missing: bool, stream: bool, incremental: bool,
+                      reconcile: bool = False) -> Dict[str, Any]:
+        """
+        Run the copy mode selected by the copy_tickets arguments.
+        
+        Returns:
+            Summary of the copy operation
+        """
+        if self.snapshot_dir and (check_missing or reconcile):
+            # Both fetch full tickets by id, so the snapshot would only hold
+            # the tickets staging lacks, not the source table
+            raise ValueError("--snapshot cannot be combined with --check-missing or --reconcile")
+        if reconcile:
+            return self._reconcile_tickets(limit)
+        if incremental:
+            return self._copy_tickets_incremental(limit)
+        if check_missing:
+            return self._copy_missing_tickets(limit, stream)
+        if stream:
+            if self.pipeline == 'asyncio':
+                return self._copy_tickets_async(limit)
+            return self._copy_tickets_streaming(limit)
+        
+        logger.info("Starting support ticket copy process...")
+        
+        # Step 1: Fetch tickets from source
+        source_tickets = self.fetch_tickets_from_source(limit)
+        if not source_tickets:
+            logger.warning("No tickets found in source")
+            return {"success": False, "message": "No tickets found in source"}
+        
+        tickets_to_copy = source_tickets
+        
+        # Step 2: Transform tickets
+        transformed_tickets = self.transform_ticket_data(tickets_to_copy)
+        
+        # Step 3: Insert tickets to staging
+        inserted_count = self.insert_tickets_to_staging(transformed_tickets)
+        
+        # Step 4: Return summary
+        success = inserted_count > 0
+        message = f"Copied {inserted_count}/{len(tickets_to_copy)} tickets"
+        
+        logger.info(f"Copy process completed: {message}")
+        
+        return {
+            "success": success,
+            "message": message,
+            "source_count": len(source_tickets),
+            "inserted_count": inserted_count
+        }
+
+    def _copy_tickets_streaming(self, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Copy support tickets as a fetch -> transform -> insert generator pipeline.
+        
+        Args:
+            limit: Maximum number of tickets to copy
+            
+        Returns:
+            Summary of the copy operation
+        """
+        logger.info("Starting streaming support ticket copy process...")
+        
+        counts = {"source_count": 0}
+        
+        def source_pages() -> Iterator[List[Dict[str, Any]]]:
+            for page in self.iter_tickets_from_source(limit):
+                counts["source_count"] += len(page)
+                yield page
+        
+        result = self.insert_ticket_stream(self.iter_transformed_tickets(source_pages()))
+        
+        if counts["source_count"] == 0:
+            logger.warning("No tickets found in source")
+            return {"success": False, "message": "No tickets found in source"}
+        
+        inserted_count = result["inserted_count"]
+        success = inserted_count > 0
+        message = f"Copied {inserted_count}/{result['ticket_count']} tickets"
+        
+        logger.info(f"Copy process completed: {message}")
+        
+        return {
+            "success": success,
+            "message": message,
+            "source_count": counts["source_count"],
+            "inserted_count": inserted_count
+        }
+
+    def _copy_tickets_async(self, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Copy support tickets with fetch, transform and insert running concurrently.
+        
+        See _run_async_pipeline. Falls back to the generator pipeline for the
+        COPY insert backend, which loads in large chunks of its own.
+        
+        Args:
+            limit: Maximum number of tickets to copy
+            
+        Returns:
+            Summary of the copy operation
+        """
+        if self.insert_backend == 'copy':
+            logger.warning("The asyncio pipeline inserts through the REST API, using the generator pipeline for COPY")
+            return self._copy_tickets_streaming(limit)
+        
+        logger.info("Starting overlapped support ticket copy process...")
+        
+        if not self._test_staging_access():
+            return {"success": False, "message": "Staging table is not accessible"}
+        
+        started = time.perf_counter()
+        counts = asyncio.run(self._run_async_pipeline(limit))
+        elapsed = time.perf_counter() - started
+        
+        if counts["source_count"] == 0:
+            logger.warning("No tickets found in source")
+            return {"success": False, "message": "No tickets found in source"}
+        
+        stages = self.metrics.to_dict()['stages']
+        busy = ', '.join(f"{stage} {totals['seconds']:.1f}s" for stage, totals in stages.items())
+        logger.info(f"Pipeline ran {elapsed:.1f}s, stage busy time: {busy}")
+        
+        inserted_count = counts["inserted_count"]
+        success = inserted_count > 0
+        message = f"Copied {inserted_count}/{counts['ticket_count']} tickets"
+        
+        logger.info(f"Copy process completed: {message}")
+        
+        return {
+            "success": success,
+            "message": message,
+            "source_count": counts["source_count"],
+            "inserted_count": inserted_count
+        }
+
+    async def _run_async_pipeline(self, limit: int = 1000) -> Dict[str, int]:
+        """
+        Run fetch -> transform -> insert as asyncio stages joined by bounded queues.
+        
+        One task pulls source pages, one transforms them and cuts insert
+        batches, and one task per insert worker posts batches. The blocking
+        HTTP and transform calls run in threads, so while a batch is being
+        inserted the next pages are already being fetched and transformed.
+        Full queues pause the stages feeding them, which bounds memory to a
+        few pages and keeps a fast source from running ahead of staging.
+        
+        Args:
+            limit: Maximum number of tickets to copy
+            
+        Returns:
+            Dictionary with the number of source tickets, tickets seen and inserted
+        """
+        workers = max(self.workers, 1)
+        # A thread for every stage that can be blocked at the same time
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=workers + 2, thread_name_prefix='pipeline'))
+        
+        pages_queue: asyncio.Queue = asyncio.Queue(maxsize=max(self.pipeline_queue_pages, 1))
+        batches_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        url = self._insert_url()
+        self._batcher = AdaptiveBatcher(self.adaptive_batch_size, self.max_batch_size) if self.adaptive_batching else None
+        counts = {"source_count": 0, "ticket_count": 0, "inserted_count": 0}
+        
+        async def fetch() -> None:
+            pages = iter(self.iter_tickets_from_source(limit))
+            while True:
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    break
+                counts["source_count"] += len(page)
+                await pages_queue.put(page)
+            await pages_queue.put(None)
+        
+        async def transform() -> None:
+            batch = []
+            batch_num = 0
+            while True:
+                page = await pages_queue.get()
+                if page is None:
+                    break
+                for ticket in await asyncio.to_thread(self.transform_ticket_data, page):
+                    batch.append(ticket)
+                    if len(batch) >= (self._batcher.size if self._batcher else self.batch_size):
+                        batch_num += 1
+                        await batches_queue.put((batch_num, batch))
+                        batch = []
+            if batch:
+                await batches_queue.put((batch_num + 1, batch))
+            for _ in range(workers):
+                await batches_queue.put(None)
+        
+        async def insert() -> None:
+            while True:
+                item = await batches_queue.get()
+                if item is None:
+                    return
+                batch_num, batch = item
+                counts["ticket_count"] += len(batch)
+                inserted_count = await asyncio.to_thread(self._insert_batch, url, batch, batch_num)
+                counts["inserted_count"] += inserted_count or 0
+        
+        await asyncio.gather(fetch(), transform(), *(insert() for _ in range(workers)))
+        
+        logger.info(f"Total inserted: {counts['inserted_count']}/{counts['ticket_count']} tickets")
+        return counts
+
+    def _copy_missing_tickets(self, limit: int = 1000, stream: bool = False) -> Dict[str, Any]:
+        """
+        Copy only the support tickets that are missing from staging.
+        
+        Only the ``id`` column is downloaded from both projects to compute the
+        difference; full rows are then fetched for the missing IDs alone.
+        
+        Args:
+            limit: Maximum number of source tickets to consider
+            stream: If True, transform and insert the missing tickets page by page
+            
+        Returns:
+            Summary of the copy operation
+        """
+        logger.info("Starting missing support ticket copy process...")
+        
+        # Step 1: Diff ticket IDs only
+        source_ids = self.fetch_ticket_ids_from_source(limit)
+        if not source_ids:
+            logger.warning("No tickets found in source")
+            return {"success": False, "message": "No tickets found in source"}
+        
+        staging_ids = self.fetch_ticket_ids_from_staging(None)
+        started = time.perf_counter()
+        missing_ids = diff_sorted_ids(source_ids, staging_ids)
+        self.metrics.record_stage('diff', time.perf_counter() - started, len(source_ids))
+        del staging_ids
+        
+        logger.info(f"Missing tickets: {len(missing_ids)}")
+        
+        if not missing_ids:
+            logger.info("No missing tickets found")
+            return {
+                "success": True,
+                "message": "No missing tickets to copy",
+                "source_count": len(source_ids),
+                "inserted_count": 0
+            }
+        
+        # Step 2: Fetch full rows for the missing IDs, transform and insert them
+        pages = self.iter_source_tickets_by_ids(missing_ids)
+        if stream:
+            result = self.insert_ticket_stream(self.iter_transformed_tickets(pages))
+            inserted_count = result["inserted_count"]
+        else:
+            tickets_to_copy = [ticket for page in pages for ticket in page]
+            transformed_tickets = self.transform_ticket_data(tickets_to_copy)
+            inserted_count = self.insert_tickets_to_staging(transformed_tickets)
+        
+        # Step 3: Return summary
+        success = inserted_count > 0
+        message = f"Copied {inserted_count}/{len(missing_ids)} tickets"
+        
+        logger.info(f"Copy process completed: {message}")
+        
+        return {
+            "success": success,
+            "message": message,
+            "source_count": len(source_ids),
+            "inserted_count": inserted_count
+        }
+
+    def _copy_tickets_incremental(self, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Copy support tickets created since the last run.
+        
+        Source tickets are streamed from just past the saved high-water mark
+        and the checkpoint is advanced after every committed batch, so a run
+        that stops halfway resumes from its last committed batch. With
+        several workers, later batches may have committed before an earlier
+        one failed, so unless an upsert mode is set the run inserts with
+        ``ignore`` and skips tickets already in staging.
+        
+        Args:
+            limit: Maximum number of tickets to copy
+            
+        Returns:
+            Summary of the copy operation
+        """
+        self._require_rest_backend("--incremental")
+        if not self._source_is_ordered():
+            # Out of order pages leave gaps below the largest copied id when a
+            # run stops early (--limit, a failed range), and a single id
+            # watermark cannot record them
+            raise ValueError("Incremental copies need source pages in id order: "
+                             "use keyset pagination with a single fetch worker")
+        
+        checkpoint = SyncCheckpoint(self.state_file)
+        state = checkpoint.load()
+        if state and state.get('source_url') not in (None, self.source_url):
+            logger.warning(f"Checkpoint {self.state_file} was written for {state.get('source_url')}, ignoring it")
+            state = {}
+        state['source_url'] = self.source_url
+        state['staging_url'] = self.staging_url
+        after_id = state.get('last_id')
+        
+        logger.info(f"Starting incremental support ticket copy process after id {after_id}...")
+        
+        counts = {"source_count": 0}
+        
+        def source_pages() -> Iterator[List[Dict[str, Any]]]:
+            for page in self.iter_tickets_from_source(limit, after_id=after_id):
+                counts["source_count"] += len(page)
+                yield page
+        
+        tracker = WatermarkTracker(checkpoint, state)
+        if not self._test_staging_access():
+            return {"success": False, "message": "Staging table is not accessible"}
+        
+        upsert = self.upsert
+        if not self.upsert:
+            # With several workers, batches past the checkpoint may already be
+            # committed; the resumed run must skip them, not fail as duplicates
+            self.upsert = 'ignore'
+        try:
+            batches = tracker.track(self._iter_batches(self.iter_transformed_tickets(source_pages())))
+            result = self._insert_batches(self._insert_url(), batches, on_batch_done=tracker.batch_done)
+        finally:
+            self.upsert = upsert
+        
+        if counts["source_count"] == 0:
+            logger.info(f"No new tickets in source after id {after_id}")
+            return {
+                "success": True,
+                "message": "No new tickets to copy",
+                "source_count": 0,
+                "inserted_count": 0
+            }
+        
+        # Tickets skipped as already copied are not counted as inserted, so
+        # success means every batch committed
+        inserted_count = result["inserted_count"]
+        success = not tracker.stalled
+        message = f"Copied {inserted_count}/{result['ticket_count']} tickets (checkpoint at id {tracker.state.get('last_id')})"
         
-        # Configuration
-        self.batch_size = int(os.getenv('BATCH_SIZE', '1'))  # Use batch size of 1 for reliability
-        self.max_retries = int(os.getenv('MAX_RETRIES', '3'))
-        self.retry_delay = float(os.getenv('RETRY_DELAY', '1.0'))
-
-
+        logger.info(f"Copy process completed: {message}")
+        
+        return {
+            "success": success,
+            "message": message,
+            "source_count": counts["source_count"],
+            "inserted_count": inserted_count
+        }
 
-    def _make_request(self, url: str, api_key: str, method: str = 'GET', data: Any = None) -> Any:
+    def _range_digests(self, project_url: str, api_key: str, after_id: int, max_id: int,
+                       buckets: int) -> Dict[int, Tuple[int, int, str]]:
         """
-        Make HTTP request to Supabase REST API.
+        Get the digests of equal-width id sub-ranges of (after_id, max_id].
         
         Args:
-            url: Full URL to request
+            project_url: Supabase project URL
             api_key: Supabase anon key
-            method: HTTP method
-            data: Request data (for POST/PUT)
+            after_id: Exclusive lower id bound
+            max_id: Inclusive upper id bound
+            buckets: Number of sub-ranges to split into
             
         Returns:
-            Response data
-            
-        Raises:
-            Exception: If request fails
+            (max_id, row_count, digest) of every non-empty sub-range, keyed by
+            its exclusive lower bound
         """
-        headers = {
-            'apikey': api_key,
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json',
-            'Prefer': 'return=representation'
-        }
-        
-        # Use service role key for staging operations to bypass RLS
-        if 'ymqptqorkuwnmvyszxls.supabase.co' in url:
-            # For staging, we need to use service role to bypass RLS
-            service_role_key = os.getenv('STAGING_SERVICE_ROLE_KEY')
-            if service_role_key:
-                headers['Authorization'] = f'Bearer {service_role_key}'
-                headers['apikey'] = service_role_key
-            else:
-                logger.warning("No STAGING_SERVICE_ROLE_KEY found. RLS might block operations.")
-        
-        for attempt in range(self.max_retries):
-            try:
-                if method.upper() == 'GET':
-                    response = requests.get(url, headers=headers, timeout=30)
-                elif method.upper() == 'POST':
-                    response = requests.post(url, headers=headers, json=data, timeout=30)
-                elif method.upper() == 'PUT':
-                    response = requests.put(url, headers=headers, json=data, timeout=30)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-                
-                response.raise_for_status()
-                
-                # Handle empty responses
-                if response.status_code == 204:
-                    return None
-                
-                # Handle successful responses (200 or 201)
-                if response.status_code in [200, 201]:
-                    return response.json()
-                
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"Request attempt {attempt + 1} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
-                else:
-                    raise Exception(f"Request failed after {self.max_retries} attempts: {e}")
+        url = f"{project_url}/rest/v1/rpc/support_ticket_range_digest"
+        rows = self._make_request(url, api_key, 'POST',
+                                  {'p_after_id': after_id, 'p_max_id': max_id, 'p_buckets': buckets})
+        return {row['bucket_after']: (row['bucket_max'], row['row_count'], row['digest']) for row in rows or []}
 
-    def fetch_tickets_from_source(self, limit: int = None) -> List[Dict[str, Any]]:
+    def _row_digests(self, project_url: str, api_key: str, after_id: int, max_id: int) -> Dict[int, str]:
         """
-        Fetch tickets from source Supabase project.
+        Get the per-ticket digests of the ids in (after_id, max_id].
         
         Args:
-            limit: Maximum number of tickets to fetch (None for all tickets)
+            project_url: Supabase project URL
+            api_key: Supabase anon key
+            after_id: Exclusive lower id bound
+            max_id: Inclusive upper id bound
             
         Returns:
-            List of ticket data
+            Digest of every ticket in the range, keyed by id
         """
-        all_tickets = []
-        offset = 0
-        page_size = 1000
+        url = f"{project_url}/rest/v1/rpc/support_ticket_row_digests"
+        rows = self._make_request(url, api_key, 'POST', {'p_after_id': after_id, 'p_max_id': max_id})
+        return {row['id']: row['digest'] for row in rows or []}
+
+    def find_changed_ticket_ids(self) -> array:
+        """
+        Find the source tickets that are missing from staging or differ from it.
         
-        while True:
-            if limit and len(all_tickets) >= limit:
-                break
-                
-            current_limit = min(page_size, limit - len(all_tickets) if limit else page_size)
-            url = f"{self.source_url}/rest/v1/support_ticket?select=*&limit={current_limit}&offset={offset}"
+        Both projects digest the same id ranges server side (migration 009).
+        Ranges with equal digests are skipped; differing ranges are split
+        into reconcile_fanout sub-ranges and compared again, down to
+        per-ticket digests once a range is at most reconcile_leaf_size ids
+        wide. An in-sync table costs one digest request per project, and each
+        changed ticket a few more.
+        
+        Returns:
+            Sorted IDs of the tickets to upsert
+        """
+        started = time.perf_counter()
+        changed = array('q')
+        bounds = self._get_id_bounds(self.source_url, self.source_key)
+        if bounds is None:
+            return changed
+        
+        ranges_compared = 0
+        extra_count = 0
+        # Depth first from the low end, so changed ids come out sorted
+        stack = [(bounds[0] - 1, bounds[1])]
+        while stack:
+            after_id, max_id = stack.pop()
+            ranges_compared += 1
             
-            try:
-                data = self._make_request(url, self.source_key, 'GET')
-                if not data or len(data) == 0:
-                    break
-                    
-                all_tickets.extend(data)
-                logger.info(f"Fetched {len(data)} tickets (offset: {offset})")
-                
-                if len(data) < current_limit:
-                    break  # No more data
-                    
-                offset += len(data)
-                
-            except Exception as e:
-                logger.error(f"Failed to fetch tickets from source: {e}")
-                break
+            if max_id - after_id <= self.reconcile_leaf_size:
+                source_digests = self._row_digests(self.source_url, self.source_key, after_id, max_id)
+                staging_digests = self._row_digests(self.staging_url, self.staging_key, after_id, max_id)
+                changed.extend(sorted(ticket_id for ticket_id, digest in source_digests.items()
+                                      if staging_digests.get(ticket_id) != digest))
+                extra_count += len(staging_digests.keys() - source_digests.keys())
+                continue
+            
+            source_ranges = self._range_digests(self.source_url, self.source_key, after_id, max_id,
+                                                self.reconcile_fanout)
+            staging_ranges = self._range_digests(self.staging_url, self.staging_key, after_id, max_id,
+                                                 self.reconcile_fanout)
+            differing = []
+            for bucket_after, (bucket_max, row_count, digest) in source_ranges.items():
+                staging_range = staging_ranges.get(bucket_after)
+                if staging_range is None or staging_range[1:] != (row_count, digest):
+                    differing.append((bucket_after, bucket_max))
+            extra_count += sum(staging_ranges[bucket_after][1]
+                               for bucket_after in staging_ranges.keys() - source_ranges.keys())
+            stack.extend(sorted(differing, reverse=True))
         
-        logger.info(f"Total fetched: {len(all_tickets)} tickets from source")
-        return all_tickets
-
+        self.metrics.record_stage('reconcile', time.perf_counter() - started, len(changed))
+        logger.info(f"Compared {ranges_compared} id ranges: {len(changed)} tickets missing or changed in staging")
+        if extra_count:
+            logger.warning(f"{extra_count} staging tickets do not exist in source, leaving them in place")
+        return changed
 
-
-    def fetch_tickets_from_staging(self, limit: int = None) -> List[Dict[str, Any]]:
+    def _reconcile_tickets(self, limit: int = 1000) -> Dict[str, Any]:
         """
-        Fetch tickets from staging Supabase project.
+        Upsert only the source tickets that are missing from staging or differ from it.
         
         Args:
-            limit: Maximum number of tickets to fetch (None for all tickets)
+            limit: Maximum number of tickets to upsert
             
         Returns:
-            List of ticket data
+            Summary of the copy operation
         """
-        all_tickets = []
-        offset = 0
-        page_size = 1000
+        logger.info("Starting support ticket reconcile process...")
         
-        while True:
-            if limit and len(all_tickets) >= limit:
-                break
-                
-            current_limit = min(page_size, limit - len(all_tickets) if limit else page_size)
-            url = f"{self.staging_url}/rest/v1/support_ticket?select=*&limit={current_limit}&offset={offset}"
-            
-            try:
-                data = self._make_request(url, self.staging_key, 'GET')
-                if not data or len(data) == 0:
-                    break
-                    
-                all_tickets.extend(data)
-                logger.info(f"Fetched {len(data)} tickets from staging (offset: {offset})")
-                
-                if len(data) < current_limit:
-                    break  # No more data
-                    
-                offset += len(data)
-                
-            except Exception as e:
-                logger.error(f"Failed to fetch tickets from staging: {e}")
-                break
+        changed_ids = self.find_changed_ticket_ids()
+        if limit and len(changed_ids) > limit:
+            changed_ids = changed_ids[:limit]
         
-        logger.info(f"Total fetched: {len(all_tickets)} tickets from staging")
-        return all_tickets
+        if not changed_ids:
+            logger.info("Staging is in sync with source")
+            return {
+                "success": True,
+                "message": "No missing or changed tickets to copy",
+                "source_count": 0,
+                "inserted_count": 0
+            }
+        
+        def complete_rows(pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+            for page in pages:
+                for ticket in page:
+                    for column in RECONCILE_COLUMNS:
+                        ticket.setdefault(column, None)
+                yield page
+        
+        pages = complete_rows(self.iter_transformed_tickets(self.iter_source_tickets_by_ids(changed_ids)))
+        upsert = self.upsert
+        self.upsert = 'merge'
+        try:
+            result = self.insert_ticket_stream(pages)
+        finally:
+            self.upsert = upsert
+        
+        inserted_count = result["inserted_count"]
+        success = inserted_count > 0
+        message = f"Upserted {inserted_count}/{len(changed_ids)} missing or changed tickets"
+        
+        logger.info(f"Reconcile process completed: {message}")
+        
+        return {
+            "success": success,
+            "message": message,
+            "source_count": len(changed_ids),
+            "inserted_count": inserted_count
+        }
 
-    def find_missing_tickets(self, source_tickets: List[Dict[str, Any]], staging_tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def follow_tickets(self, stop_event: Optional[threading.Event] = None) -> Dict[str, Any]:
         """
-        Find tickets that exist in source but not in staging.
+        Keep copying new source tickets to staging until stopped.
+        
+        Picks up from the checkpoint in state_file like an incremental copy,
+        then polls the source for tickets past the watermark and inserts them
+        as soon as they are fetched, over the same warm connections. SIGTERM
+        or SIGINT (or setting stop_event) stops polling; batches already
+        fetched are still inserted and the checkpoint saved before returning.
         
         Args:
-            source_tickets: List of tickets from source
-            staging_tickets: List of tickets from staging
+            stop_event: Optional event that ends the run when set
             
         Returns:
-            List of tickets that need to be copied
+            Summary of the run
         """
-        # Create sets of ticket IDs for comparison
-        source_ids = {ticket.get('id') for ticket in source_tickets if ticket.get('id')}
-        staging_ids = {ticket.get('id') for ticket in staging_tickets if ticket.get('id')}
+        stop_event = stop_event or threading.Event()
         
-        # Find missing IDs
-        missing_ids = source_ids - staging_ids
+        def handle_signal(signum: int, frame: Any) -> None:
+            logger.info(f"Received {signal.Signals(signum).name}, stopping after in-flight batches")
+            stop_event.set()
         
-        # Get the full ticket data for missing tickets
-        missing_tickets = [ticket for ticket in source_tickets if ticket.get('id') in missing_ids]
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous_handlers[signum] = signal.signal(signum, handle_signal)
         
-        logger.info(f"Missing tickets: {len(missing_tickets)}")
+        self.metrics = CopyMetrics()
+        self.metrics.start_progress(self.progress_interval)
+        result = {"success": False, "message": "Follow did not complete"}
+        try:
+            result = self._follow_tickets(stop_event)
+            return result
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self.metrics.finish(result)
+            self._write_reports()
+
+    def _follow_tickets(self, stop_event: threading.Event) -> Dict[str, Any]:
+        """
+        Poll loop of follow_tickets.
         
-        return missing_tickets
+        Returns:
+            Summary of the run
+        """
+        self._require_rest_backend("--follow")
+        checkpoint = SyncCheckpoint(self.state_file)
+        state = checkpoint.load()
+        if state and state.get('source_url') not in (None, self.source_url):
+            logger.warning(f"Checkpoint {self.state_file} was written for {state.get('source_url')}, ignoring it")
+            state = {}
+        state['source_url'] = self.source_url
+        state['staging_url'] = self.staging_url
+        
+        if not self._test_staging_access():
+            return {"success": False, "message": "Staging table is not accessible"}
+        
+        upsert = self.upsert
+        if self.follow_lookback and not self.upsert:
+            # Tickets re-read after a restart must not fail as duplicates
+            self.upsert = 'ignore'
+        self._bisect_rejects = True
+        try:
+            return self._follow_loop(checkpoint, state, stop_event)
+        finally:
+            self.upsert = upsert
+            self._bisect_rejects = False
 
-    def transform_ticket_data(self, tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _follow_loop(self, checkpoint: SyncCheckpoint, state: Dict[str, Any],
+                     stop_event: threading.Event) -> Dict[str, Any]:
         """
-        Transform ticket data for staging environment.
+        Poll for and insert new tickets until stop_event is set.
+        
+        Batches staging rejects for their data are bisected and the bad
+        tickets written to reject_file, so the checkpoint moves past them. A
+        batch that fails for another reason holds the checkpoint, and the
+        following polls retry from it, each reading at most follow_poll_rows
+        tickets past the lookback window.
         
-        Args:
-            tickets: Raw ticket data from source
-            
         Returns:
-            Transformed ticket data for staging
+            Summary of the run
         """
-        transformed_tickets = []
-        
-        for ticket in tickets:
-            # Create a clean ticket with original ID from source
-            transformed_ticket = {
-                'id': ticket.get('id'),  # Use original ID from source
-                'name': ticket.get('name', 'Unknown'),
-                'reason': ticket.get('reason', 'No reason provided'),
-                'atleast_paid_once': False,
-                'resolution_status': 'Pending',
-                'call_attempts': 0
-            }
+        url = self._insert_url()
+        logger.info(f"Following source tickets after id {state.get('last_id')} "
+                    f"(poll every {self.follow_interval:g}s, up to {self.follow_max_interval:g}s when idle)")
+        
+        # Ids inside the lookback window that are already in staging
+        recent_ids: Set[int] = set()
+        poll_limit = self.follow_lookback + self.follow_poll_rows
+        totals = {"source_count": 0, "inserted_count": 0, "polls": 0, "fetched": 0}
+        interval = self.follow_interval
+        
+        def new_pages(after_id: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+            for page in self._iter_pages(self.source_url, self.source_key, 'source', poll_limit,
+                                         after_id=after_id):
+                totals["fetched"] += len(page)
+                page = [ticket for ticket in page if ticket['id'] not in recent_ids]
+                if page:
+                    totals["source_count"] += len(page)
+                    yield page
+                if stop_event.is_set():
+                    break
+        
+        while not stop_event.is_set():
+            totals["polls"] += 1
+            totals["fetched"] = 0
+            last_id = state.get('last_id')
+            after_id = max(last_id - self.follow_lookback, 0) if last_id and self.follow_lookback else last_id
             
-            # Set tenant_id separately to ensure proper UUID format
-            if self.staging_tenant_id:
-                transformed_ticket['tenant_id'] = self.staging_tenant_id
-            
-            # Copy fields from source ticket if they exist (excluding tenant_id)
-            field_mapping = {
-                'ticket_date': 'ticket_date',
-                'user_id': 'user_id',
-                'phone': 'phone',
-                'source': 'source',
-                'subscription_status': 'subscription_status',
-                'badge': 'badge',
-                'poster': 'poster',
-                'layout_status': 'layout_status',
-                'resolution_time': 'resolution_time',
-                'cse_name': 'cse_name',
-                'cse_remarks': 'cse_remarks',
-                'call_status': 'call_status',
-                'assigned_to': 'assigned_to',
-                'rm_name': 'rm_name',
-                'completed_at': 'completed_at',
-                'snooze_until': 'snooze_until',
-                'praja_dashboard_user_link': 'praja_dashboard_user_link',
-                'display_pic_url': 'display_pic_url',
-                'dumped_at': 'dumped_at'
-            }
+            tracker = WatermarkTracker(checkpoint, state)
             
-            # Copy fields from source ticket
-            for source_field, target_field in field_mapping.items():
-                if source_field in ticket and ticket[source_field] is not None:
-                    transformed_ticket[target_field] = ticket[source_field]
+            def batch_done(batch_num: int, batch: List[Dict[str, Any]], inserted_count: Optional[int]) -> None:
+                tracker.batch_done(batch_num, batch, inserted_count)
+                if inserted_count is not None and self.follow_lookback:
+                    recent_ids.update(ticket['id'] for ticket in batch)
             
-            # Handle atleast_paid_once specifically
-            if 'atleast_paid_once' in ticket and ticket['atleast_paid_once'] is not None:
-                transformed_ticket['atleast_paid_once'] = ticket['atleast_paid_once']
+            batches = tracker.track(self._iter_batches(self.iter_transformed_tickets(new_pages(after_id))))
+            result = self._insert_batches(url, batches, on_batch_done=batch_done)
+            state = tracker.state
             
-            # Handle other_reasons specifically (should be text array)
-            if 'other_reasons' in ticket and ticket['other_reasons'] is not None:
-                if isinstance(ticket['other_reasons'], list):
-                    transformed_ticket['other_reasons'] = ticket['other_reasons']
-                elif isinstance(ticket['other_reasons'], str):
-                    try:
-                        # Try to parse as JSON first
-                        parsed = json.loads(ticket['other_reasons'])
-                        if isinstance(parsed, list):
-                            transformed_ticket['other_reasons'] = parsed
-                        else:
-                            transformed_ticket['other_reasons'] = [ticket['other_reasons']]
-                    except:
-                        transformed_ticket['other_reasons'] = [ticket['other_reasons']]
-            # Don't set other_reasons if not present (let it be null)
-            
-            # Handle call_attempts specifically
-            if 'call_attempts' in ticket and ticket['call_attempts'] is not None:
-                transformed_ticket['call_attempts'] = ticket['call_attempts']
-            
-            # Handle call_status specifically - set default only if not present in source
-            if 'call_status' not in transformed_ticket or transformed_ticket['call_status'] is None:
-                transformed_ticket['call_status'] = 'Call Waiting'
-            
-            # Set assigned_to to the specified UUID only for tickets that already have an assigned_to value
-            if 'assigned_to' in transformed_ticket and transformed_ticket['assigned_to'] is not None:
-                transformed_ticket['assigned_to'] = '2e81a97e-c091-45a8-a7f4-213d00c6db7a'
-            
-            transformed_tickets.append(transformed_ticket)
-        
-        logger.info(f"Transformed {len(transformed_tickets)} tickets")
-        return transformed_tickets
+            if result["ticket_count"]:
+                totals["inserted_count"] += result["inserted_count"]
+                logger.info(f"Copied {result['inserted_count']}/{result['ticket_count']} new tickets "
+                            f"(checkpoint at id {state.get('last_id')})")
+            
+            advanced = state.get('last_id') != last_id
+            if tracker.stalled:
+                logger.warning(f"Checkpoint held at id {state.get('last_id')}, retrying on the next poll")
+            if advanced and totals["fetched"] >= poll_limit:
+                interval = 0  # More tickets are waiting past this poll's cap
+            elif advanced or result["inserted_count"]:
+                interval = self.follow_interval
+            else:
+                # Idle, or retrying a failed batch
+                interval = min(max(interval, self.follow_interval) * 2,
+                               max(self.follow_max_interval, self.follow_interval))
+            
+            if state.get('last_id') and self.follow_lookback:
+                floor = state['last_id'] - self.follow_lookback
+                recent_ids = {ticket_id for ticket_id in recent_ids if ticket_id > floor}
+            
+            stop_event.wait(interval)
+        
+        message = (f"Followed source for {totals['polls']} polls, copied {totals['inserted_count']}/"
+                   f"{totals['source_count']} tickets (checkpoint at id {state.get('last_id')})")
+        logger.info(f"Follow stopped: {message}")
+        
+        return {
+            "success": True,
+            "message": message,
+            "source_count": totals["source_count"],
+            "inserted_count": totals["inserted_count"]
+        }
 
-    def _get_next_available_id(self) -> int:
+    def copy_shard(self, shard: int, shard_count: int) -> Dict[str, Any]:
         """
-        Get the next available ID from the staging support_ticket table.
+        Copy one slice of the source id space, coordinating with other workers.
+        
+        The first worker splits the current source ids into shard_count equal
+        ranges in the shard_store lease store. This worker then leases shard
+        ``shard``, copies it with a heartbeat keeping the lease alive, and
+        records its watermark as batches commit. Afterwards it reclaims any
+        shard whose worker stopped renewing its lease and finishes that too.
+        Tickets created after the split are outside every shard; pick them up
+        with --incremental or --follow.
         
+        Args:
+            shard: 0-based shard number
+            shard_count: Total number of shards
+            
         Returns:
-            Next available ID
+            Summary of the copy operation
         """
+        self.metrics = CopyMetrics()
+        self.metrics.start_progress(self.progress_interval)
+        result = {"success": False, "message": "Copy did not complete"}
         try:
-            url = f"{self.staging_url}/rest/v1/support_ticket?select=id&order=id.desc&limit=1"
-            data = self._make_request(url, self.staging_key, 'GET')
-            
-            if data and len(data) > 0:
-                max_id = data[0].get('id', 0)
-                return max_id + 1
-            else:
-                return 1  # Start from 1 if table is empty
-                
-        except Exception as e:
-            logger.warning(f"Failed to get next ID, using fallback: {e}")
-            return 1000000  # Use a high number as fallback
+            result = self._copy_shards(shard, shard_count)
+            return result
+        finally:
+            self.metrics.finish(result)
+            self._write_reports()
 
-    def insert_tickets_to_staging(self, tickets: List[Dict[str, Any]]) -> int:
+    def _copy_shards(self, shard: int, shard_count: int) -> Dict[str, Any]:
         """
-        Insert transformed tickets into staging support_ticket table.
+        Claim and copy shards for copy_shard.
+        
+        Returns:
+            Summary of the copy operation
+        """
+        self._require_rest_backend("--shard")
+        store = ShardLeaseStore(self.shard_store, self.shard_lease_seconds)
+        bounds = self._get_id_bounds(self.source_url, self.source_key)
+        if bounds is None:
+            logger.warning("No tickets found in source")
+            return {"success": False, "message": "No tickets found in source"}
+        if not store.ensure_plan(self.source_url, shard_count, *bounds) and \
+                store.summary().get('done', 0) == shard_count:
+            # A store left by an earlier, finished copy; reusing it would copy nothing
+            message = (f"Every shard in {self.shard_store} is already done; delete it or pass a new "
+                       f"--shard-store to start another sharded copy")
+            logger.error(message)
+            return {"success": False, "message": message}
+        
+        if not self._test_staging_access():
+            return {"success": False, "message": "Staging table is not accessible"}
+        
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        totals = {"source_count": 0, "inserted_count": 0}
+        copied_shards = []
+        failed = False
+        
+        upsert = self.upsert
+        if not self.upsert:
+            # A reclaimed shard resumes at its last committed batch; later
+            # batches its previous worker got in must not fail as duplicates
+            self.upsert = 'ignore'
+        try:
+            row = store.claim(owner, shard)
+            if row is None:
+                logger.info(f"Shard {shard}/{shard_count} is done or leased by another worker")
+                row = store.claim(owner)
+            while row is not None:
+                result = self._copy_shard_range(store, row, owner)
+                totals["source_count"] += result["ticket_count"]
+                totals["inserted_count"] += result["inserted_count"]
+                if not result["done"]:
+                    failed = True
+                    break
+                copied_shards.append(row['shard'])
+                row = store.claim(owner)
+        finally:
+            self.upsert = upsert
+        
+        status = store.summary()
+        message = (f"Copied {totals['inserted_count']}/{totals['source_count']} tickets in shards "
+                   f"{copied_shards or 'none'}; {status.get('done', 0)}/{shard_count} shards done")
+        logger.info(f"Shard copy completed: {message}")
+        
+        return {
+            "success": not failed,
+            "message": message,
+            "source_count": totals["source_count"],
+            "inserted_count": totals["inserted_count"]
+        }
+
+    def _copy_shard_range(self, store: ShardLeaseStore, row: Dict[str, Any], owner: str) -> Dict[str, Any]:
+        """
+        Copy the tickets of a leased shard past its last committed id.
         
         Args:
-            tickets: List of transformed tickets
+            store: Lease store
+            row: Claimed shard row
+            owner: Worker holding the lease
             
         Returns:
-            Number of successfully inserted tickets
+            Ticket counts, and whether the shard is now done
         """
-        url = f"{self.staging_url}/rest/v1/support_ticket"
+        shard = row['shard']
+        after_id = row['last_id'] if row['last_id'] is not None else row['after_id']
+        logger.info(f"Copying shard {shard}: ids {after_id + 1}..{row['max_id']}")
         
-        # First, test if we can access the table
+        lost = threading.Event()
+        finished = threading.Event()
+        
+        def heartbeat() -> None:
+            while not finished.wait(store.lease_seconds / 3):
+                if not store.heartbeat(shard, owner):
+                    logger.error(f"Lost the lease on shard {shard}, stopping it")
+                    lost.set()
+                    return
+        
+        def pages() -> Iterator[List[Dict[str, Any]]]:
+            for page in self._iter_pages(self.source_url, self.source_key, f'source shard {shard}', None,
+                                         after_id=after_id, max_id=row['max_id']):
+                yield page
+                if lost.is_set():
+                    break
+        
+        heartbeat_thread = threading.Thread(target=heartbeat, name=f'shard-{shard}-heartbeat', daemon=True)
+        heartbeat_thread.start()
+        tracker = WatermarkTracker(_ShardCheckpoint(store, shard, owner), {'last_id': after_id})
         try:
-            test_response = self._make_request(f"{url}?limit=1", self.staging_key, 'GET')
-            logger.info(f"Table access test successful: {len(test_response) if test_response else 0} records found")
-        except Exception as e:
-            logger.error(f"Table access test failed: {e}")
-            return 0
+            batches = tracker.track(self._iter_batches(self.iter_transformed_tickets(pages())))
+            result = self._insert_batches(self._insert_url(), batches, on_batch_done=tracker.batch_done)
+        finally:
+            finished.set()
+            heartbeat_thread.join()
         
-        total_inserted = 0
-        total_batches = (len(tickets) + self.batch_size - 1) // self.batch_size
+        done = not lost.is_set() and not tracker.stalled
+        if done:
+            # A failed page fetch ends the page stream early without an error,
+            # so only call the shard done if no source ids are left in it
+            last_id = tracker.state['last_id']
+            remaining = self._get_id_bounds(self.source_url, self.source_key, after_id=last_id)
+            done = remaining is None or remaining[0] > row['max_id']
+            if not done:
+                logger.warning(f"Shard {shard} stopped at id {last_id} short of {row['max_id']}")
+        store.release(shard, owner, done, result["inserted_count"])
+        logger.info(f"Shard {shard}: inserted {result['inserted_count']}/{result['ticket_count']} tickets, "
+                    f"{'done' if done else 'left for another worker'}")
+        return {**result, "done": done}
+
+    def copy_tables(self, tables: List[TableCopyConfig], limit: int = None) -> Dict[str, Any]:
+        """
+        Copy several tables from source to staging in one run.
         
-        for i in range(0, len(tickets), self.batch_size):
-            batch = tickets[i:i + self.batch_size]
-            batch_num = (i // self.batch_size) + 1
-            
-            logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} tickets)")
+        Up to table_workers tables are copied at the same time, sharing this
+        copier's connection pools, rate limiters and insert settings. A table
+        starts once every table it depends on in this run has been copied;
+        if one of them fails, its dependents are skipped.
+        
+        Args:
+            tables: Tables to copy, e.g. values from STAGING_TABLES
+            limit: Maximum number of rows to copy per table
             
-            try:
-                # Log the first ticket in the batch for debugging
-                if batch_num == 1 and len(batch) > 0:
-                    logger.info(f"Sample ticket data being inserted: {json.dumps(batch[0], indent=2, default=str)}")
-                
-                data = self._make_request(url, self.staging_key, 'POST', batch)
-                inserted_count = len(data) if isinstance(data, list) else 1
-                total_inserted += inserted_count
+        Returns:
+            Summary of the copy operation, with a summary per table
+        """
+        self.metrics = CopyMetrics()
+        self.metrics.start_progress(self.progress_interval)
+        result = {"success": False, "message": "Copy did not complete"}
+        try:
+            result = self._copy_tables(tables, limit)
+            return result
+        finally:
+            self.metrics.finish(result)
+            self._write_reports()
+
+    def _copy_tables(self, tables: List[TableCopyConfig], limit: int = None) -> Dict[str, Any]:
+        """
+        Schedule the table copies of copy_tables in dependency order.
+        
+        Returns:
+            Summary of the copy operation
+        """
+        self._require_rest_backend("--tables")
+        if self.adaptive_batching and self.table_workers > 1:
+            raise ValueError("Adaptive batching cannot be combined with concurrent table copies")
+        
+        configs = {config.name: config for config in tables}
+        # Dependencies outside this run are assumed to be in staging already
+        waiting_on = {name: {dep for dep in config.depends_on if dep in configs}
+                      for name, config in configs.items()}
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        logger.info(f"Starting copy of tables: {', '.join(configs)}")
+        
+        with ThreadPoolExecutor(max_workers=max(self.table_workers, 1), thread_name_prefix='table') as executor:
+            running = {}
+            while waiting_on or running:
+                for name in [name for name, deps in waiting_on.items() if not deps]:
+                    del waiting_on[name]
+                    running[executor.submit(self._copy_table, configs[name], limit)] = name
                 
-                logger.info(f"Batch {batch_num}: Inserted {inserted_count}/{len(batch)} tickets")
+                if not running:
+                    raise ValueError(f"Circular table dependencies between: {', '.join(sorted(waiting_on))}")
                 
-            except Exception as e:
-                logger.error(f"Failed to insert batch {batch_num}: {e}")
-                # Log the error response if available
-                if hasattr(e, 'response') and e.response is not None:
-                    logger.error(f"Response status: {e.response.status_code}")
-                    logger.error(f"Response headers: {dict(e.response.headers)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
                     try:
-                        error_detail = e.response.json()
-                        logger.error(f"Error details: {json.dumps(error_detail, indent=2)}")
-                    except Exception as json_error:
-                        logger.error(f"Error response text: {e.response.text}")
-                        logger.error(f"JSON parse error: {json_error}")
-                # Also log the actual data being sent for debugging
-                if batch_num == 1 and len(batch) > 0:
-                    logger.error(f"Failed data sample: {json.dumps(batch[0], indent=2, default=str)}")
-                continue
+                        results[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to copy table {name}: {e}")
+                        results[name] = {"success": False, "message": str(e)}
+                    
+                    failed = [name] if not results[name]["success"] else []
+                    while failed:
+                        failed_name = failed.pop()
+                        for dependent, deps in list(waiting_on.items()):
+                            if failed_name in deps:
+                                del waiting_on[dependent]
+                                logger.error(f"Skipping table {dependent}: dependency {failed_name} was not copied")
+                                results[dependent] = {"success": False,
+                                                      "message": f"Skipped, dependency {failed_name} was not copied"}
+                                failed.append(dependent)
+                    for deps in waiting_on.values():
+                        deps.discard(name)
         
-        logger.info(f"Total inserted: {total_inserted}/{len(tickets)} tickets")
-        return total_inserted
+        inserted_count = sum(result.get("inserted_count", 0) for result in results.values())
+        source_count = sum(result.get("source_count", 0) for result in results.values())
+        copied = sum(1 for result in results.values() if result["success"])
+        message = f"Copied {inserted_count}/{source_count} rows, {copied}/{len(configs)} tables succeeded"
+        logger.info(f"Table copy completed: {message}")
+        
+        return {
+            "success": copied == len(configs),
+            "message": message,
+            "source_count": source_count,
+            "inserted_count": inserted_count,
+            "tables": results,
+        }
 
-    def copy_tickets(self, limit: int = 1000, check_missing: bool = False) -> Dict[str, Any]:
+    def _copy_table(self, config: TableCopyConfig, limit: int = None) -> Dict[str, Any]:
         """
-        Main method to copy support tickets from source to staging.
+        Stream one table from source to staging with its own transform.
         
         Args:
-            limit: Maximum number of tickets to copy
-            check_missing: If True, only copy tickets that don't exist in staging
+            config: Table to copy
+            limit: Maximum number of rows to copy
             
         Returns:
-            Summary of the copy operation
+            Summary of the table copy
         """
-        logger.info("Starting support ticket copy process...")
-        
-        # Step 1: Fetch tickets from source
-        source_tickets = self.fetch_tickets_from_source(limit)
-        if not source_tickets:
-            logger.warning("No tickets found in source")
-            return {"success": False, "message": "No tickets found in source"}
+        logger.info(f"Copying table {config.name}...")
         
-        # Step 2: If checking for missing tickets, fetch staging tickets and compare
-        tickets_to_copy = source_tickets
-        if check_missing:
-            staging_tickets = self.fetch_tickets_from_staging(None)
-            tickets_to_copy = self.find_missing_tickets(source_tickets, staging_tickets)
-            
-            if not tickets_to_copy:
-                logger.info("No missing tickets found")
-                return {
-                    "success": True,
-                    "message": "No missing tickets to copy",
-                    "source_count": len(source_tickets),
-                    "inserted_count": 0
-                }
+        transform = compile_transform(config.transform, {'staging_tenant_id': self.staging_tenant_id})
+        counts = {"source_count": 0}
         
-        # Step 3: Transform tickets
-        transformed_tickets = self.transform_ticket_data(tickets_to_copy)
+        def transformed_pages() -> Iterator[List[Dict[str, Any]]]:
+            for page in self._iter_pages(self.source_url, self.source_key, f"source {config.name}", limit,
+                                         config.select, table=config.name, key=config.key):
+                counts["source_count"] += len(page)
+                started = time.perf_counter()
+                rows = transform(page)
+                self.metrics.record_stage('transform', time.perf_counter() - started, len(rows))
+                yield rows
         
-        # Step 4: Insert tickets to staging
-        inserted_count = self.insert_tickets_to_staging(transformed_tickets)
+        if not self._test_staging_access(config.name):
+            return {"success": False, "message": f"Staging table {config.name} is not accessible"}
         
-        # Step 5: Return summary
-        success = inserted_count > 0
-        message = f"Copied {inserted_count}/{len(tickets_to_copy)} tickets"
+        url = self._insert_url(config.name, config.key)
+        result = self._insert_batches(url, self._iter_batches(transformed_pages()))
         
-        logger.info(f"Copy process completed: {message}")
+        source_count = counts["source_count"]
+        inserted_count = result["inserted_count"]
+        message = f"Copied {inserted_count}/{source_count} {config.name} rows"
+        logger.info(f"Table {config.name}: {message}")
         
         return {
-            "success": success,
+            "success": source_count == 0 or inserted_count > 0,
             "message": message,
-            "source_count": len(source_tickets),
+            "source_count": source_count,
             "inserted_count": inserted_count
         }
 
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a --shard argument of the form i/N, with 0 <= i < N."""
+    try:
+        shard, shard_count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if shard_count < 1 or not 0 <= shard < shard_count:
+        raise argparse.ArgumentTypeError(f"shard must be between 0 and N-1, got {value!r}")
+    return shard, shard_count
+
 def load_config_from_file():
     """Load configuration from supabase-config.json file"""
     config_path = Path(__file__).parent.parent / "supabase-config.json"
@@ -472,9 +3681,54 @@ def main():
     parser.add_argument('--limit', type=int, default=1000, help='Maximum tickets to copy')
     parser.add_argument('--config-file', action='store_true', help='Use configuration from supabase-config.json file')
     parser.add_argument('--check-missing', action='store_true', help='Only copy tickets that don\'t exist in staging')
+    parser.add_argument('--stream', action='store_true', help='Stream fetch, transform and insert page by page with bounded memory')
+    parser.add_argument('--reconcile', action='store_true', help='Upsert only tickets that are missing or changed in staging, found by comparing id-range digests (needs migration 009 on both projects)')
+    parser.add_argument('--incremental', action='store_true', help='Only copy tickets past the checkpoint saved by the previous run')
+    parser.add_argument('--follow', action='store_true', help='Keep running and copy new source tickets past the checkpoint as they arrive, until SIGTERM')
+    parser.add_argument('--poll-interval', type=float, help='Seconds between --follow polls while tickets are arriving (default: 2)')
+    parser.add_argument('--max-poll-interval', type=float, help='Longest --follow poll interval while the source is idle (default: 30)')
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N', help='Copy the i-th of N id ranges (0-based), coordinating with other workers through --shard-store')
+    parser.add_argument('--shard-store', help='SQLite lease store shared by --shard workers (default: pyro_ticket_shards.sqlite)')
+    parser.add_argument('--state-file', help='Checkpoint file for --incremental (default: pyro_ticket_copy_state.json)')
+    parser.add_argument('--upsert', choices=['merge', 'ignore'], help='Upsert on id conflicts, merging or ignoring duplicates, so re-runs are safe')
+    parser.add_argument('--adaptive-batches', action='store_true', help='Start with large batches, bisect rejected ones and write bad rows to the reject file')
+    parser.add_argument('--reject-file', help='NDJSON file for rows rejected in --adaptive-batches mode (default: pyro_ticket_rejects.ndjson)')
+    parser.add_argument('--snapshot', metavar='DIR', help='Write fetched source pages to compressed NDJSON segments in DIR, not with --check-missing, --reconcile, --follow, --shard or --tables')
+    parser.add_argument('--from-snapshot', metavar='DIR', help='Replay source tickets from a snapshot in DIR instead of the source project, not with --follow, --shard or --tables')
+    parser.add_argument('--report-json', metavar='PATH', help='Write a JSON run report with per-stage and per-endpoint metrics to PATH')
+    parser.add_argument('--report-prometheus', metavar='PATH', help='Write run metrics in Prometheus text format to PATH')
+    parser.add_argument('--progress-interval', type=float, help='Log a progress line every N seconds')
+    parser.add_argument('--insert-backend', choices=['rest', 'copy'], help='Insert through the REST API or with Postgres COPY over --staging-dsn; COPY is not supported with --incremental, --follow, --shard or --tables (default: rest)')
+    parser.add_argument('--staging-dsn', help='Staging Postgres connection string for --insert-backend copy')
+    parser.add_argument('--copy-format', choices=['text', 'binary'], help='COPY data format for --insert-backend copy (default: text)')
+    parser.add_argument('--tables', nargs='+', choices=list(STAGING_TABLES), metavar='TABLE',
+                        help=f"Copy these tables instead of only support tickets, in dependency order ({', '.join(STAGING_TABLES)})")
+    parser.add_argument('--table-workers', type=int, help='Number of tables copied concurrently with --tables (default: 1)')
+    parser.add_argument('--rate-limit', type=float, help='Maximum requests per second to each Supabase project (default: no limit)')
+    parser.add_argument('--workers', type=int, help='Number of concurrent insert requests (default: 1)')
+    parser.add_argument('--fetch-workers', type=int, help='Number of concurrent id-range readers on the source, not with --incremental (default: 1)')
+    parser.add_argument('--pipeline', choices=['generator', 'asyncio'], help='Engine for --stream: a generator chain, or overlapping asyncio stages with bounded queues (default: generator)')
+    parser.add_argument('--pagination', choices=['keyset', 'offset'], help='Pagination mode for fetching tickets (default: keyset)')
     
     args = parser.parse_args()
     
+    if args.insert_backend == 'copy':
+        for flag, used in (('--incremental', args.incremental), ('--follow', args.follow),
+                           ('--shard', args.shard), ('--tables', args.tables)):
+            if used:
+                parser.error(f"--insert-backend copy cannot be combined with {flag}")
+    for snapshot_flag, snapshot_dir in (('--snapshot', args.snapshot), ('--from-snapshot', args.from_snapshot)):
+        if not snapshot_dir:
+            continue
+        # Only copy_tickets reads source pages through the snapshot
+        for flag, used in (('--follow', args.follow), ('--shard', args.shard), ('--tables', args.tables)):
+            if used:
+                parser.error(f"{snapshot_flag} cannot be combined with {flag}")
+    if args.snapshot and (args.check_missing or args.reconcile):
+        parser.error("--snapshot cannot be combined with --check-missing or --reconcile")
+    if args.incremental and ((args.fetch_workers or 1) > 1 or args.pagination == 'offset'):
+        parser.error("--incremental needs source pages in id order: use keyset pagination with a single fetch worker")
+    
     # Load configuration from file if requested or if no command line args provided
     config = None
     if args.config_file or (not args.source_url and not args.source_key and not args.staging_url and not args.staging_key):
@@ -513,25 +3767,80 @@ def main():
         source_key = args.source_key
         staging_url = args.staging_url
         staging_key = args.staging_key
+        staging_service_key = args.staging_service_key
     
     # Create copier instance
     copier = SupabaseTicketCopier(
         source_url=source_url,
         source_key=source_key,
         staging_url=staging_url,
-        staging_key=staging_key
+        staging_key=staging_key,
+        staging_service_key=staging_service_key
     )
     
     # If using config file, set the additional configuration
     if config:
         copier.staging_tenant_id = config.get('staging_tenant_id', copier.staging_tenant_id)
     
-    # Set service role key if provided
-    if staging_service_key:
-        os.environ['STAGING_SERVICE_ROLE_KEY'] = staging_service_key
+    if args.pagination:
+        copier.pagination = args.pagination
+    if args.pipeline:
+        copier.pipeline = args.pipeline
+    if args.poll_interval:
+        copier.follow_interval = args.poll_interval
+    if args.max_poll_interval:
+        copier.follow_max_interval = args.max_poll_interval
+    if args.workers:
+        copier.workers = args.workers
+    if args.rate_limit:
+        copier.rate_limit = args.rate_limit
+    if args.table_workers:
+        copier.table_workers = args.table_workers
+    if args.insert_backend:
+        copier.insert_backend = args.insert_backend
+    if args.staging_dsn:
+        copier.staging_dsn = args.staging_dsn
+    if args.copy_format:
+        copier.copy_format = args.copy_format
+    if args.fetch_workers:
+        copier.fetch_workers = args.fetch_workers
+    if args.state_file:
+        copier.state_file = args.state_file
+    if args.shard_store:
+        copier.shard_store = args.shard_store
+    if args.upsert:
+        copier.upsert = args.upsert
+    if args.adaptive_batches:
+        copier.adaptive_batching = True
+    if args.reject_file:
+        copier.reject_file = args.reject_file
+    if args.snapshot:
+        copier.snapshot_dir = args.snapshot
+    if args.from_snapshot:
+        copier.from_snapshot = args.from_snapshot
+    if args.report_json:
+        copier.report_json = args.report_json
+    if args.report_prometheus:
+        copier.report_prometheus = args.report_prometheus
+    if args.progress_interval:
+        copier.progress_interval = args.progress_interval
     
     # Execute copy operation
-    result = copier.copy_tickets(args.limit, args.check_missing)
+    try:
+        if args.shard:
+            result = copier.copy_shard(*args.shard)
+        elif args.follow:
+            result = copier.follow_tickets()
+        elif args.tables:
+            result = copier.copy_tables([STAGING_TABLES[name] for name in args.tables], args.limit)
+        else:
+            result = copier.copy_tickets(args.limit, args.check_missing, args.stream, args.incremental,
+                                         args.reconcile)
+    except ValueError as e:
+        # Settings that only conflict at run time, e.g. INSERT_BACKEND=copy without a DSN
+        result = {"success": False, "message": str(e)}
+    finally:
+        copier.close()
     
     # Print result
     if result["success"]:
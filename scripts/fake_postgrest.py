@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase REST (PostgREST) endpoints used by
+copy_pyro_tickets_supabase.py.
+
+Serves ``/rest/v1/<table>`` from in-memory tables with the subset of the
+PostgREST API the copier relies on:
+
+  GET   select, limit, offset, order=<col>.asc|desc and column filters
+        (eq, neq, gt, gte, lt, lte, in), Prefer: count=exact
+  POST  JSON object or array, on_conflict, Prefer: return=minimal|representation,
+        count=exact, resolution=merge-duplicates|ignore-duplicates
+  POST  /rest/v1/rpc/<function> for the support_ticket digest functions of
+        migration 009, or any function registered with FakePostgrest.rpc
+
+Latency, server errors and 429 rate limiting can be injected to exercise
+retry and concurrency behaviour, and rows with chosen keys can be refused
+with a 400 to exercise batch bisection. Used by bench_copy.py, and can be run on its
+own for manual testing:
+
+    python scripts/fake_postgrest.py --port 54321 --rows 100000
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import hashlib
+import threading
+from bisect import bisect_left, bisect_right, insort
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+RESERVED_PARAMS = {'select', 'limit', 'offset', 'order', 'on_conflict', 'columns'}
+
+class FakeTable:
+    """In-memory table kept sorted by its key column."""
+
+    def __init__(self, key: str = 'id'):
+        self.key = key
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self.keys: List[Any] = []
+        self.next_id = 1
+        self.lock = threading.Lock()
+        # Keys whose rows are refused with a 400, like a failed check constraint
+        self.rejected_keys: set = set()
+        # Column defaults used for columns a row leaves out under missing=default
+        self.defaults: Dict[str, Any] = {}
+
+    def load(self, rows: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            for row in rows:
+                self.rows[row[self.key]] = dict(row)
+            self.keys = sorted(self.rows)
+            if self.keys and isinstance(self.keys[-1], int):
+                self.next_id = self.keys[-1] + 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.rows.clear()
+            self.keys = []
+            self.next_id = 1
+
+    def select(self, filters: List[Tuple[str, str, str]], order: Optional[str],
+               limit: Optional[int], offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the matching rows for one page and the total match count."""
+        with self.lock:
+            keys = self._key_range(filters)
+            other_filters = [f for f in filters if f[0] != self.key or f[1] not in ('gt', 'gte', 'lt', 'lte')]
+            rows = [self.rows[k] for k in keys]
+            for column, op, value in other_filters:
+                rows = [row for row in rows if _matches(row.get(column), op, value)]
+
+        if order:
+            column, _, direction = order.partition('.')
+            descending = direction.startswith('desc')
+            if column == self.key:
+                if descending:
+                    rows.reverse()
+            else:
+                rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=descending)
+
+        total = len(rows)
+        end = None if limit is None else offset + limit
+        return rows[offset:end], total
+
+    def insert(self, rows: List[Dict[str, Any]], resolution: Optional[str]) -> Tuple[Optional[List[Dict[str, Any]]], Any]:
+        """
+        Insert rows, returning (inserted rows, None) or (None, conflicting key).
+
+        The whole statement is rejected on the first conflict unless a
+        resolution is given, like a single INSERT ... ON CONFLICT.
+        """
+        with self.lock:
+            if resolution is None:
+                for row in rows:
+                    if row.get(self.key) in self.rows:
+                        return None, row.get(self.key)
+
+            written = []
+            for row in rows:
+                row = dict(row)
+                if row.get(self.key) is None:
+                    row[self.key] = self.next_id
+                key = row[self.key]
+                if key in self.rows:
+                    if resolution == 'ignore-duplicates':
+                        continue
+                    self.rows[key].update(row)
+                    written.append(self.rows[key])
+                    continue
+                self.rows[key] = row
+                insort(self.keys, key)
+                if isinstance(key, int):
+                    self.next_id = max(self.next_id, key + 1)
+                written.append(row)
+            return written, None
+
+    def _key_range(self, filters: List[Tuple[str, str, str]]) -> List[Any]:
+        """Narrow the sorted keys using range filters on the key column."""
+        low, high = 0, len(self.keys)
+        for column, op, value in filters:
+            if column != self.key or op not in ('gt', 'gte', 'lt', 'lte'):
+                continue
+            value = _coerce(value, self.keys[0] if self.keys else None)
+            if op == 'gt':
+                low = max(low, bisect_right(self.keys, value))
+            elif op == 'gte':
+                low = max(low, bisect_left(self.keys, value))
+            elif op == 'lt':
+                high = min(high, bisect_left(self.keys, value))
+            elif op == 'lte':
+                high = min(high, bisect_right(self.keys, value))
+        return self.keys[low:high]
+
+def _coerce(value: str, like: Any) -> Any:
+    """Convert a filter value to the type of the stored column value."""
+    if isinstance(like, bool):
+        return value == 'true'
+    if isinstance(like, int):
+        return int(value)
+    if isinstance(like, float):
+        return float(value)
+    return value
+
+def _matches(stored: Any, op: str, value: str) -> bool:
+    if op == 'is':
+        return stored is None if value == 'null' else str(stored).lower() == value
+    if stored is None:
+        return False
+    if op == 'in':
+        return stored in {_coerce(item, stored) for item in value.strip('()').split(',') if item}
+    value = _coerce(value, stored)
+    if op == 'eq':
+        return stored == value
+    if op == 'neq':
+        return stored != value
+    if op == 'gt':
+        return stored > value
+    if op == 'gte':
+        return stored >= value
+    if op == 'lt':
+        return stored < value
+    if op == 'lte':
+        return stored <= value
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+def support_ticket_row_digest(row: Dict[str, Any]) -> str:
+    """Python counterpart of public.support_ticket_row_digest (migration 009)."""
+    values = [
+        row.get('user_id'),
+        row.get('name'),
+        row.get('phone'),
+        row.get('source'),
+        row.get('subscription_status'),
+        False if row.get('atleast_paid_once') is None else row['atleast_paid_once'],
+        row.get('reason'),
+        row.get('badge'),
+        row.get('poster'),
+        row.get('layout_status'),
+        row.get('resolution_time'),
+        row.get('cse_name'),
+        row.get('cse_remarks'),
+        'Call Waiting' if row.get('call_status') is None else row['call_status'],
+        0 if row.get('call_attempts') is None else row['call_attempts'],
+        row.get('rm_name'),
+        row.get('completed_at'),
+        row.get('snooze_until'),
+    ]
+    return hashlib.md5(json.dumps(values, default=str).encode('utf-8')).hexdigest()
+
+def _ticket_range(fake: 'FakePostgrest', args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows, _ = fake.table('support_ticket').select(
+        [('id', 'gt', str(args['p_after_id'])), ('id', 'lte', str(args['p_max_id']))], None, None, 0)
+    return rows
+
+def _support_ticket_range_digest(fake: 'FakePostgrest', args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    after_id, max_id = args['p_after_id'], args['p_max_id']
+    width = max(1, -(-(max_id - after_id) // max(args['p_buckets'], 1)))
+    buckets: Dict[int, List[str]] = {}
+    for row in _ticket_range(fake, args):
+        buckets.setdefault((row['id'] - after_id - 1) // width, []).append(
+            f"{row['id']}:{support_ticket_row_digest(row)}")
+    return [{
+        'bucket_after': after_id + bucket * width,
+        'bucket_max': min(after_id + (bucket + 1) * width, max_id),
+        'row_count': len(entries),
+        'digest': hashlib.md5(','.join(entries).encode('utf-8')).hexdigest(),
+    } for bucket, entries in sorted(buckets.items())]
+
+def _support_ticket_row_digests(fake: 'FakePostgrest', args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'id': row['id'], 'digest': support_ticket_row_digest(row)} for row in _ticket_range(fake, args)]
+
+class FakePostgrest:
+    """
+    Threaded HTTP server emulating one Supabase project's REST API.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        latency: Seconds added to every response
+        jitter: Extra random latency of up to this many seconds
+        error_rate: Fraction of requests answered with a 503
+        rate_limit_rate: Fraction of requests answered with a 429
+        retry_after: Retry-After seconds sent with injected 429s
+        seed: Random seed for fault injection
+        max_rows: Most rows a GET returns whatever its limit, like PostgREST's
+            db-max-rows (1000 on hosted Supabase)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: Optional[int] = None, max_rows: Optional[int] = None):
+        self.tables: Dict[str, FakeTable] = {}
+        self.functions: Dict[str, Callable[['FakePostgrest', Dict[str, Any]], Any]] = {
+            'support_ticket_range_digest': _support_ticket_range_digest,
+            'support_ticket_row_digests': _support_ticket_row_digests,
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_rows = max_rows
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors_injected': 0, 'rate_limited': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self.stats_lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def table(self, name: str, key: str = 'id') -> FakeTable:
+        if name not in self.tables:
+            self.tables[name] = FakeTable(key)
+        return self.tables[name]
+
+    def rpc(self, name: str, function: Callable[['FakePostgrest', Dict[str, Any]], Any]) -> None:
+        """Serve function(fake, arguments) at /rest/v1/rpc/<name>."""
+        self.functions[name] = function
+
+    def start(self) -> 'FakePostgrest':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-postgrest', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, stat: str, amount: int = 1) -> None:
+        with self.stats_lock:
+            self.stats[stat] += amount
+
+    def _inject_fault(self) -> Optional[int]:
+        with self.random_lock:
+            roll = self.random.random()
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            self._count('rate_limited')
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._count('errors_injected')
+            return 503
+        return None
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def _handle(self, method: str) -> None:
+                fake._count('requests')
+                body = b''
+                if method == 'POST':
+                    body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                    fake._count('bytes_in', len(body))
+
+                fault = fake._inject_fault()
+                if fault == 429:
+                    return self._send(429, {'message': 'Too many requests'}, {'Retry-After': f'{fake.retry_after:g}'})
+                if fault == 503:
+                    return self._send(503, {'message': 'Service unavailable'})
+
+                parts = urlsplit(self.path)
+                if not parts.path.startswith('/rest/v1/'):
+                    return self._send(404, {'message': f'Unknown path {parts.path}'})
+                table_name = parts.path[len('/rest/v1/'):]
+                if table_name.startswith('rpc/') and method == 'POST':
+                    return self._rpc(table_name[len('rpc/'):], body)
+                if table_name not in fake.tables:
+                    return self._send(404, {'code': '42P01', 'message': f'relation "public.{table_name}" does not exist'})
+                table = fake.tables[table_name]
+
+                params = parse_qsl(parts.query, keep_blank_values=True)
+                prefer = {item.strip() for item in self.headers.get('Prefer', '').split(',') if item.strip()}
+                try:
+                    if method == 'GET':
+                        return self._get(table, params, prefer)
+                    return self._post(table, params, prefer, body)
+                except (ValueError, KeyError) as e:
+                    return self._send(400, {'code': 'PGRST100', 'message': str(e)})
+
+            def _get(self, table: FakeTable, params: List[Tuple[str, str]], prefer: set) -> None:
+                options = {k: v for k, v in params if k in RESERVED_PARAMS}
+                filters = []
+                for column, expression in params:
+                    if column in RESERVED_PARAMS:
+                        continue
+                    op, _, value = expression.partition('.')
+                    filters.append((column, op, value))
+
+                limit = int(options['limit']) if 'limit' in options else None
+                if fake.max_rows is not None:
+                    limit = fake.max_rows if limit is None else min(limit, fake.max_rows)
+                offset = int(options.get('offset', 0))
+                rows, total = table.select(filters, options.get('order'), limit, offset)
+
+                select = options.get('select', '*')
+                if select != '*':
+                    columns = select.split(',')
+                    rows = [{column: row.get(column) for column in columns} for row in rows]
+
+                headers = {}
+                if 'count=exact' in prefer:
+                    end = offset + len(rows) - 1
+                    headers['Content-Range'] = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+                return self._send(200, rows, headers)
+
+            def _post(self, table: FakeTable, params: List[Tuple[str, str]], prefer: set, body: bytes) -> None:
+                payload = json.loads(body or b'[]')
+                rows = payload if isinstance(payload, list) else [payload]
+
+                options = dict(params)
+                if 'columns' in options:
+                    columns = options['columns'].split(',')
+                    use_defaults = 'missing=default' in prefer
+                    rows = [{column: row[column] if column in row else
+                             (table.defaults.get(column) if use_defaults else None)
+                             for column in columns} for row in rows]
+                elif any(row.keys() != rows[0].keys() for row in rows):
+                    return self._send(400, {
+                        'code': 'PGRST102',
+                        'details': None,
+                        'hint': None,
+                        'message': 'All object keys must match',
+                    })
+
+                resolution = None
+                if 'resolution=merge-duplicates' in prefer:
+                    resolution = 'merge-duplicates'
+                elif 'resolution=ignore-duplicates' in prefer:
+                    resolution = 'ignore-duplicates'
+
+                rejected = [row.get(table.key) for row in rows if row.get(table.key) in table.rejected_keys]
+                if rejected:
+                    return self._send(400, {
+                        'code': '23514',
+                        'details': f'Failing row contains ({rejected[0]}, ...).',
+                        'hint': None,
+                        'message': 'new row violates check constraint',
+                    })
+
+                written, conflict = table.insert(rows, resolution)
+                if written is None:
+                    return self._send(409, {
+                        'code': '23505',
+                        'details': f'Key ({table.key})=({conflict}) already exists.',
+                        'hint': None,
+                        'message': f'duplicate key value violates unique constraint "{table.key}_pkey"',
+                    })
+
+                headers = {}
+                if 'count=exact' in prefer:
+                    headers['Content-Range'] = f"*/{len(written)}"
+                if 'return=minimal' in prefer:
+                    return self._send(201, None, headers)
+                return self._send(201, written, headers)
+
+            def _rpc(self, name: str, body: bytes) -> None:
+                if name not in fake.functions:
+                    return self._send(404, {'code': 'PGRST202', 'message': f'Could not find the function public.{name}'})
+                try:
+                    return self._send(200, fake.functions[name](fake, json.loads(body or b'{}')))
+                except (ValueError, KeyError, TypeError) as e:
+                    return self._send(400, {'code': 'PGRST100', 'message': str(e)})
+
+            def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                body = b'' if payload is None else json.dumps(payload, default=str).encode('utf-8')
+                fake._count('bytes_out', len(body))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake Supabase REST endpoint')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=54321, help='Port to bind')
+    parser.add_argument('--rows', type=int, default=0, help='Synthetic support tickets to preload')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with a 429')
+
+    args = parser.parse_args()
+
+    fake = FakePostgrest(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                         rate_limit_rate=args.rate_limit_rate)
+    table = fake.table('support_ticket')
+    if args.rows:
+        from bench_transform import synthetic_ticket
+        rng = random.Random(42)
+        table.load([synthetic_ticket(i, rng) for i in range(1, args.rows + 1)])
+
+    print(f"Serving fake Supabase REST API at {fake.url} ({args.rows} support tickets)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Regression tests for copy_pyro_tickets_supabase.py, run against local fake
+Supabase projects (see fake_postgrest.py).
+
+Usage:
+    python scripts/test_copy_pyro_tickets_supabase.py
+    python -m unittest discover -s scripts -p 'test_*.py'
+
+The COPY insert backend tests also need psycopg 3 and a throwaway Postgres
+database, in which they drop and recreate public.support_ticket:
+
+    docker run --rm -d -p 54329:5432 -e POSTGRES_HOST_AUTH_METHOD=trust postgres:16
+    TEST_STAGING_DSN=postgresql://postgres@localhost:54329/postgres python scripts/test_copy_pyro_tickets_supabase.py
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import tempfile
+import threading
+import unittest
+import contextlib
+from io import StringIO
+from unittest import mock
+from typing import Callable, Iterable, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgrest
+from bench_transform import synthetic_ticket
+from copy_pyro_tickets_supabase import (STAGING_TABLES, ShardLeaseStore, SnapshotReader, SnapshotWriter,
+                                        SupabaseRequestError, SupabaseTicketCopier, SyncCheckpoint, main, psycopg)
+
+TEST_STAGING_DSN = os.getenv('TEST_STAGING_DSN')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'supabase', 'migrations')
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+class CopierTestCase(unittest.TestCase):
+    """Fresh fake source and staging projects, and a scratch directory, per test."""
+
+    def setUp(self):
+        self.source = FakePostgrest().start()
+        self.addCleanup(self.source.stop)
+        self.staging = FakePostgrest().start()
+        self.addCleanup(self.staging.stop)
+        self.source_tickets = self.source.table('support_ticket')
+        self.staging_tickets = self.staging.table('support_ticket')
+        
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.scratch = scratch.name
+
+    def load_source(self, ids: Iterable[int]) -> None:
+        rng = random.Random(42)
+        self.source_tickets.load([synthetic_ticket(ticket_id, rng) for ticket_id in ids])
+
+    def make_copier(self, **settings) -> SupabaseTicketCopier:
+        copier = SupabaseTicketCopier(self.source.url, 'test-source-key', self.staging.url, 'test-staging-key',
+                                      staging_service_key='test-service-key')
+        copier.state_file = os.path.join(self.scratch, 'state.json')
+        copier.reject_file = os.path.join(self.scratch, 'rejects.ndjson')
+        copier.retry_delay = 0.01
+        copier.batch_size = 100
+        for name, value in settings.items():
+            setattr(copier, name, value)
+        self.addCleanup(copier.close)
+        return copier
+
+    def checkpoint(self) -> dict:
+        return SyncCheckpoint(os.path.join(self.scratch, 'state.json')).load()
+
+    def assertStagingIds(self, ids: Iterable[int]) -> None:
+        self.assertEqual(sorted(self.staging_tickets.rows), list(ids))
+
+    def wait_for(self, condition: Callable[[], bool], timeout: float = 10.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the copier")
+            time.sleep(0.02)
+
+class IncrementalCopyTest(CopierTestCase):
+
+    def test_copies_past_checkpoint(self):
+        self.load_source(range(1, 501))
+        copier = self.make_copier(batch_size=100)
+        
+        result = copier.copy_tickets(None, incremental=True)
+        
+        self.assertTrue(result['success'])
+        self.assertStagingIds(range(1, 501))
+        self.assertEqual(self.checkpoint()['last_id'], 500)
+        
+        self.load_source(range(501, 551))
+        result = copier.copy_tickets(None, incremental=True)
+        
+        self.assertEqual(result['inserted_count'], 50)
+        self.assertStagingIds(range(1, 551))
+        self.assertEqual(self.checkpoint()['last_id'], 550)
+
+    def test_mixed_key_batches_are_not_bisected(self):
+        # The transform leaves out null copy fields, so batch rows differ in keys
+        self.load_source(range(1, 501))
+        copier = self.make_copier(batch_size=100, adaptive_batching=True)
+        post_batch = copier._post_batch
+        posted = []
+        
+        def count_posts(url, batch):
+            posted.append(len(batch))
+            return post_batch(url, batch)
+        
+        copier._post_batch = count_posts
+        result = copier.copy_tickets(None, incremental=True)
+        
+        self.assertTrue(result['success'])
+        self.assertStagingIds(range(1, 501))
+        self.assertEqual(sum(posted), 500)
+        self.assertFalse(os.path.exists(copier.reject_file))
+        columns = set().union(*(row.keys() for row in self.staging_tickets.rows.values()))
+        self.assertTrue(all(row.keys() == columns for row in self.staging_tickets.rows.values()))
+
+    def test_resumes_after_batches_committed_out_of_order(self):
+        # A run with several workers committed 1-200 and 301-500 but not 201-300
+        self.load_source(range(1, 701))
+        self.staging_tickets.load([{'id': ticket_id} for ticket_id in [*range(1, 201), *range(301, 501)]])
+        SyncCheckpoint(os.path.join(self.scratch, 'state.json')).save({'source_url': self.source.url, 'last_id': 200})
+        copier = self.make_copier(batch_size=100, workers=4)
+        
+        result = copier.copy_tickets(None, incremental=True)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['inserted_count'], 300)
+        self.assertStagingIds(range(1, 701))
+        self.assertEqual(self.checkpoint()['last_id'], 700)
+
+    def test_failed_batch_holds_checkpoint(self):
+        self.load_source(range(1, 501))
+        copier = self.make_copier(batch_size=100)
+        post_batch = copier._post_batch
+        
+        def fail_third_batch(url, batch):
+            if batch[0]['id'] == 201:
+                raise OSError('connection reset')
+            return post_batch(url, batch)
+        
+        copier._post_batch = fail_third_batch
+        result = copier.copy_tickets(None, incremental=True)
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(self.checkpoint()['last_id'], 200)
+        
+        copier._post_batch = post_batch
+        result = copier.copy_tickets(None, incremental=True)
+        
+        self.assertTrue(result['success'])
+        self.assertStagingIds(range(1, 501))
+        self.assertEqual(self.checkpoint()['last_id'], 500)
+
+    def test_refuses_out_of_order_source(self):
+        self.load_source(range(1, 101))
+        copier = self.make_copier(fetch_workers=4)
+        
+        with self.assertRaises(ValueError):
+            copier.copy_tickets(None, incremental=True)
+        self.assertEqual(self.staging_tickets.rows, {})
+
+class FollowTest(CopierTestCase):
+
+    def follow(self, copier: SupabaseTicketCopier) -> threading.Event:
+        """Run follow_tickets in a thread until the returned event is set."""
+        stop = threading.Event()
+        thread = threading.Thread(target=copier.follow_tickets, args=(stop,), daemon=True)
+        thread.start()
+        
+        def stop_following():
+            stop.set()
+            thread.join(10)
+        
+        self.addCleanup(stop_following)
+        return stop
+
+    def test_rejected_ticket_does_not_hold_checkpoint(self):
+        self.load_source(range(1, 301))
+        self.staging_tickets.rejected_keys.add(100)
+        copier = self.make_copier(batch_size=50, follow_interval=0.02, follow_max_interval=0.05)
+        
+        self.follow(copier)
+        self.wait_for(lambda: self.checkpoint().get('last_id') == 300)
+        
+        self.assertStagingIds([ticket_id for ticket_id in range(1, 301) if ticket_id != 100])
+        with open(copier.reject_file) as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [100])
+
+    def test_failing_batch_is_retried_with_bounded_reads(self):
+        self.load_source(range(1, 1001))
+        copier = self.make_copier(batch_size=50, follow_interval=0.02, follow_max_interval=0.05,
+                                  follow_lookback=10, follow_poll_rows=100)
+        post_batch = copier._post_batch
+        staging_down = threading.Event()
+        staging_down.set()
+        
+        def fail_while_down(url, batch):
+            if staging_down.is_set() and batch[0]['id'] > 100:
+                raise OSError('connection reset')
+            return post_batch(url, batch)
+        
+        iter_pages = copier._iter_pages
+        poll_reads = []
+        
+        def count_reads(*args, **kwargs):
+            poll_reads.append(0)
+            for page in iter_pages(*args, **kwargs):
+                poll_reads[-1] += len(page)
+                yield page
+        
+        copier._post_batch = fail_while_down
+        copier._iter_pages = count_reads
+        self.follow(copier)
+        self.wait_for(lambda: len(poll_reads) >= 5)
+        
+        # Polls retry from the held checkpoint, each reading at most the
+        # lookback window and follow_poll_rows tickets
+        self.assertEqual(self.checkpoint()['last_id'], 100)
+        self.assertLessEqual(max(poll_reads), 110)
+        
+        staging_down.clear()
+        self.wait_for(lambda: self.checkpoint().get('last_id') == 1000)
+        self.assertStagingIds(range(1, 1001))
+
+class PaginationTest(CopierTestCase):
+
+    def test_page_size_above_server_max_rows(self):
+        self.source.max_rows = 1000
+        self.load_source(range(1, 2501))
+        copier = self.make_copier(page_size=5000)
+        
+        result = copier.copy_tickets(None, stream=True)
+        
+        self.assertTrue(result['success'])
+        self.assertStagingIds(range(1, 2501))
+
+class ReconcileTest(CopierTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.rpc_calls = {'source': [], 'staging': []}
+        for name, fake in (('source', self.source), ('staging', self.staging)):
+            for function_name, function in list(fake.functions.items()):
+                fake.rpc(function_name, self.counting(self.rpc_calls[name], function_name, function))
+        
+        self.load_source(range(1, 2001))
+        self.assertTrue(self.make_copier().copy_tickets(None)['success'])
+
+    @staticmethod
+    def counting(calls: list, name: str, function: Callable) -> Callable:
+        def call(fake, args):
+            calls.append(name)
+            return function(fake, args)
+        return call
+
+    def test_in_sync_table_costs_one_round(self):
+        copier = self.make_copier()
+        
+        self.assertEqual(len(copier.find_changed_ticket_ids()), 0)
+        self.assertEqual(self.rpc_calls['source'], ['support_ticket_range_digest'])
+        self.assertEqual(self.rpc_calls['staging'], ['support_ticket_range_digest'])
+
+    def test_changed_ticket_is_upserted(self):
+        self.source_tickets.rows[1234]['cse_remarks'] = 'Asked for a refund'
+        copier = self.make_copier()
+        
+        self.assertEqual(list(copier.find_changed_ticket_ids()), [1234])
+        result = copier.copy_tickets(None, reconcile=True)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['inserted_count'], 1)
+        self.assertEqual(self.staging_tickets.rows[1234]['cse_remarks'], 'Asked for a refund')
+        self.assertEqual(len(self.make_copier().find_changed_ticket_ids()), 0)
+
+    def test_value_cleared_in_source_is_cleared_in_staging(self):
+        ticket_id = next(ticket_id for ticket_id, row in self.source_tickets.rows.items() if row['cse_remarks'])
+        self.source_tickets.rows[ticket_id]['cse_remarks'] = None
+        copier = self.make_copier()
+        
+        result = copier.copy_tickets(None, reconcile=True)
+        
+        self.assertTrue(result['success'])
+        self.assertIsNone(self.staging_tickets.rows[ticket_id]['cse_remarks'])
+        self.assertEqual(len(self.make_copier().find_changed_ticket_ids()), 0)
+
+class SnapshotTest(CopierTestCase):
+
+    def test_replay_matches_source(self):
+        self.load_source(range(1, 3001))
+        snapshot_dir = os.path.join(self.scratch, 'snapshot')
+        self.make_copier(snapshot_dir=snapshot_dir, snapshot_segment_rows=1000).copy_tickets(None, stream=True)
+        self.staging_tickets.clear()
+        
+        result = self.make_copier(from_snapshot=snapshot_dir).copy_tickets(None, stream=True)
+        
+        self.assertTrue(result['success'])
+        self.assertStagingIds(range(1, 3001))
+
+    def test_new_snapshot_replaces_old_index_first(self):
+        self.load_source(range(1, 3001))
+        snapshot_dir = os.path.join(self.scratch, 'snapshot')
+        self.make_copier(snapshot_dir=snapshot_dir, snapshot_segment_rows=1000).copy_tickets(None, stream=True)
+        
+        # A second snapshot that dies before closing its first segment
+        writer = SnapshotWriter(snapshot_dir, self.source.url, 1000)
+        writer.write_page([{'id': 1}])
+        
+        self.assertEqual(SnapshotReader(snapshot_dir).index['segments'], [])
+        self.assertEqual(list(SnapshotReader(snapshot_dir).iter_pages(100)), [])
+
+    def test_rejects_by_id_modes(self):
+        copier = self.make_copier(snapshot_dir=os.path.join(self.scratch, 'snapshot'))
+        
+        with self.assertRaises(ValueError):
+            copier.copy_tickets(None, check_missing=True)
+        with self.assertRaises(ValueError):
+            copier.copy_tickets(None, reconcile=True)
+
+class ShardTest(CopierTestCase):
+
+    def make_copier(self, **settings) -> SupabaseTicketCopier:
+        settings.setdefault('shard_store', os.path.join(self.scratch, 'shards.sqlite'))
+        settings.setdefault('shard_lease_seconds', 1.0)
+        return super().make_copier(**settings)
+
+    def test_shards_cover_source(self):
+        self.load_source(range(1, 1001))
+        results = [self.make_copier().copy_shard(shard, 3) for shard in range(3)]
+        
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertStagingIds(range(1, 1001))
+
+    def test_reclaims_expired_lease(self):
+        self.load_source(range(1, 1001))
+        self.make_copier().copy_shard(0, 2)
+        # A worker that claimed shard 1 and crashed after committing 100 tickets
+        store = ShardLeaseStore(os.path.join(self.scratch, 'shards.sqlite'), 0.1)
+        row = store.claim('crashed-worker', 1)
+        store.save_progress(1, 'crashed-worker', row['after_id'] + 100)
+        time.sleep(0.2)
+        
+        result = self.make_copier().copy_shard(0, 2)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(store.summary(), {'done': 2})
+        self.assertStagingIds([*range(1, 501), *range(601, 1001)])
+
+    def test_refuses_finished_store(self):
+        self.load_source(range(1, 101))
+        self.make_copier().copy_shard(0, 1)
+        
+        result = self.make_copier().copy_shard(0, 1)
+        
+        self.assertFalse(result['success'])
+        self.assertIn('already done', result['message'])
+
+class CopyBackendTest(CopierTestCase):
+
+    def setUp(self):
+        super().setUp()
+        if TEST_STAGING_DSN and psycopg is not None:
+            with open(os.path.join(MIGRATIONS_DIR, '008_create_support_ticket_table.sql')) as f:
+                create_table = f.read().split(';')[0]
+            with psycopg.connect(TEST_STAGING_DSN, autocommit=True) as conn:
+                conn.execute("DROP TABLE IF EXISTS public.support_ticket")
+                conn.execute(create_table)
+                # Staging columns added outside the migrations in this repo
+                conn.execute("ALTER TABLE public.support_ticket ADD COLUMN assigned_to uuid, "
+                             "ADD COLUMN praja_dashboard_user_link text, ADD COLUMN display_pic_url text, "
+                             "ADD COLUMN dumped_at timestamptz")
+
+    def staging_query(self, query: str) -> Optional[tuple]:
+        with psycopg.connect(TEST_STAGING_DSN) as conn:
+            cursor = conn.execute(query)
+            return cursor.fetchone() if cursor.description else None
+
+    @unittest.skipUnless(TEST_STAGING_DSN and psycopg is not None, "needs psycopg and TEST_STAGING_DSN")
+    def test_copy_formats(self):
+        self.load_source(range(1, 3001))
+        for copy_format in ('text', 'binary'):
+            with self.subTest(copy_format=copy_format):
+                self.staging_query("TRUNCATE public.support_ticket")
+                copier = self.make_copier(insert_backend='copy', staging_dsn=TEST_STAGING_DSN,
+                                          copy_format=copy_format, copy_chunk_rows=1000)
+                
+                result = copier.copy_tickets(None, stream=True)
+                
+                self.assertTrue(result['success'])
+                self.assertEqual(self.staging_query("SELECT count(*), min(id), max(id) FROM public.support_ticket"),
+                                 (3000, 1, 3000))
+                # The id sequence is moved past the copied ids
+                self.assertEqual(self.staging_query(
+                    "INSERT INTO public.support_ticket (name) VALUES ('new') RETURNING id"), (3001,))
+
+    @unittest.skipUnless(TEST_STAGING_DSN and psycopg is not None, "needs psycopg and TEST_STAGING_DSN")
+    def test_upsert_merges_changed_tickets(self):
+        self.load_source(range(1, 201))
+        copier = self.make_copier(insert_backend='copy', staging_dsn=TEST_STAGING_DSN)
+        copier.copy_tickets(None, stream=True)
+        
+        self.source_tickets.rows[5]['cse_remarks'] = 'Changed in source'
+        copier.upsert = 'merge'
+        result = copier.copy_tickets(None, stream=True)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(self.staging_query("SELECT count(*) FROM public.support_ticket"), (200,))
+        self.assertEqual(self.staging_query("SELECT cse_remarks FROM public.support_ticket WHERE id = 5"),
+                         ('Changed in source',))
+
+    def test_rejected_in_rest_only_modes(self):
+        copier = self.make_copier(insert_backend='copy', staging_dsn='postgresql://unused')
+        
+        with self.assertRaises(ValueError):
+            copier.copy_tickets(None, incremental=True)
+        with self.assertRaises(ValueError):
+            copier.follow_tickets(threading.Event())
+        with self.assertRaises(ValueError):
+            copier.copy_shard(0, 2)
+        with self.assertRaises(ValueError):
+            copier.copy_tables([STAGING_TABLES['support_ticket']])
+
+class RetryTest(CopierTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # A staging project that throttles one request in five
+        self.staging = FakePostgrest(rate_limit_rate=0.2, retry_after=0.3, seed=7).start()
+        self.addCleanup(self.staging.stop)
+        self.staging_tickets = self.staging.table('support_ticket')
+
+    def test_retry_after_pauses_all_workers(self):
+        self.staging.rate_limit_rate = 1.0
+        copier = self.make_copier()
+        limiter = copier._get_rate_limiter(copier.staging_url)
+        url = f"{self.staging.url}/rest/v1/support_ticket?select=id&limit=1"
+        throttled = threading.Thread(target=copier._make_request, args=(url, 'test-staging-key'), daemon=True)
+        throttled.start()
+        self.addCleanup(throttled.join, 10)
+        self.wait_for(lambda: limiter.paused_until > time.monotonic())
+        self.staging.rate_limit_rate = 0.0
+        paused_until = limiter.paused_until
+        
+        # A second worker that never saw the 429 still waits out the Retry-After
+        started = time.monotonic()
+        copier._make_request(url, 'test-staging-key')
+        
+        self.assertLess(started, paused_until)
+        self.assertGreaterEqual(time.monotonic(), paused_until)
+
+    def test_data_error_fails_after_one_attempt(self):
+        self.staging.rate_limit_rate = 0.0
+        self.staging_tickets.rejected_keys.add(1)
+        copier = self.make_copier(max_retries=5)
+        
+        with self.assertRaises(SupabaseRequestError) as error:
+            copier._post_batch(copier._insert_url(), [{'id': 1, 'name': 'Rejected'}])
+        
+        self.assertEqual(error.exception.response.status_code, 400)
+        self.assertEqual(self.staging.stats['requests'], 1)
+        self.assertEqual(copier.metrics.to_dict()['retries'], 0)
+
+    def test_retries_are_reported(self):
+        self.load_source(range(1, 1001))
+        report_json = os.path.join(self.scratch, 'report.json')
+        copier = self.make_copier(workers=4, max_retries=10, report_json=report_json)
+        
+        result = copier.copy_tickets(None)
+        
+        self.assertTrue(result['success'])
+        self.assertStagingIds(range(1, 1001))
+        with open(report_json) as f:
+            report = json.load(f)
+        self.assertGreater(self.staging.stats['rate_limited'], 0)
+        self.assertEqual(report['retries'], self.staging.stats['rate_limited'])
+        inserts = next(endpoint for endpoint in report['requests']
+                       if endpoint['project'] == 'staging' and endpoint['method'] == 'POST')
+        self.assertEqual(inserts['retries'], inserts['status'].get('429', 0))
+
+class CommandLineTest(CopierTestCase):
+
+    def run_main(self, *argv: str, **environ: str) -> Tuple[int, str, str]:
+        """Run main() in the scratch directory, returning (exit code, stdout, stderr)."""
+        argv = ['copy_pyro_tickets_supabase.py', '--source-url', self.source.url, '--source-key', 'test-source-key',
+                '--staging-url', self.staging.url, '--staging-key', 'test-staging-key', *argv]
+        stdout, stderr = StringIO(), StringIO()
+        cwd = os.getcwd()
+        os.chdir(self.scratch)
+        self.addCleanup(os.chdir, cwd)
+        with mock.patch.object(sys, 'argv', argv), mock.patch.dict(os.environ, environ), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit) as exit_info:
+                main()
+        return exit_info.exception.code, stdout.getvalue(), stderr.getvalue()
+
+    def test_copy_backend_rejected_in_rest_only_modes(self):
+        for mode in (['--incremental'], ['--follow'], ['--shard', '0/2'], ['--tables', 'support_ticket']):
+            with self.subTest(mode=mode[0]):
+                code, _, stderr = self.run_main('--insert-backend', 'copy', '--staging-dsn', 'postgresql://unused',
+                                                *mode)
+                
+                self.assertEqual(code, 2)
+                self.assertIn(f"--insert-backend copy cannot be combined with {mode[0]}", stderr)
+
+    def test_incremental_rejected_with_unordered_source(self):
+        for option in (['--fetch-workers', '4'], ['--pagination', 'offset']):
+            with self.subTest(option=option[0]):
+                code, _, stderr = self.run_main('--incremental', *option)
+                
+                self.assertEqual(code, 2)
+                self.assertIn("--incremental needs source pages in id order", stderr)
+
+    def test_snapshot_rejected_in_other_modes(self):
+        snapshot_dir = os.path.join(self.scratch, 'snapshot')
+        cases = [(snapshot_flag, mode) for snapshot_flag in ('--snapshot', '--from-snapshot')
+                 for mode in (['--follow'], ['--shard', '0/2'], ['--tables', 'support_ticket'])]
+        cases += [('--snapshot', ['--check-missing']), ('--snapshot', ['--reconcile'])]
+        for snapshot_flag, mode in cases:
+            with self.subTest(snapshot=snapshot_flag, mode=mode[0]):
+                code, _, stderr = self.run_main(snapshot_flag, snapshot_dir, *mode)
+                
+                self.assertEqual(code, 2)
+                self.assertIn(f"{snapshot_flag} cannot be combined with", stderr)
+                self.assertIn(mode[0], stderr)
+        self.assertFalse(os.path.exists(snapshot_dir))
+
+    def test_shard_plan_mismatch_is_reported(self):
+        self.load_source(range(1, 101))
+        shard_store = os.path.join(self.scratch, 'shards.sqlite')
+        ShardLeaseStore(shard_store, 60).ensure_plan(self.source.url, 3, 1, 100)
+        
+        code, stdout, _ = self.run_main('--shard', '0/2', '--shard-store', shard_store)
+        
+        self.assertEqual(code, 1)
+        self.assertIn(f"❌ Shard store {shard_store} holds a plan for 3 shards", stdout)
+        self.assertEqual(self.staging_tickets.rows, {})
+
+    def test_run_time_setting_errors_are_reported(self):
+        self.load_source(range(1, 11))
+        
+        code, stdout, _ = self.run_main('--incremental', INSERT_BACKEND='copy')
+        
+        self.assertEqual(code, 1)
+        self.assertIn("❌ --incremental inserts through the REST API", stdout)
+        self.assertEqual(self.staging_tickets.rows, {})
+
+if __name__ == '__main__':
+    unittest.main()
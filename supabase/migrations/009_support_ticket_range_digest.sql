@@ -0,0 +1,88 @@
+-- Row and id-range digests of support_ticket, used by
+-- scripts/copy_pyro_tickets_supabase.py --reconcile to find tickets that
+-- changed in the source project after they were copied to staging.
+-- Apply this migration to both the source and the staging project.
+
+-- Digest of the columns the copy carries over unchanged, with the defaults
+-- the copy applies to nulls, so a source ticket and its staging copy share a
+-- digest until one of them changes. Columns the copy overrides (tenant_id,
+-- resolution_status, assigned_to) are left out. Timestamps are compared as
+-- epochs so the session time zone does not matter.
+CREATE OR REPLACE FUNCTION public.support_ticket_row_digest(t public.support_ticket)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT md5(ROW(
+    t.user_id,
+    t.name,
+    t.phone,
+    t.source,
+    t.subscription_status,
+    coalesce(t.atleast_paid_once, false),
+    t.reason,
+    t.badge,
+    t.poster,
+    t.layout_status,
+    t.resolution_time,
+    t.cse_name,
+    t.cse_remarks,
+    coalesce(t.call_status, 'Call Waiting'),
+    coalesce(t.call_attempts, 0),
+    t.rm_name,
+    extract(epoch FROM t.completed_at),
+    extract(epoch FROM t.snooze_until)
+  )::text)
+$$;
+
+-- Split the ids in (p_after_id, p_max_id] into p_buckets equal-width ranges
+-- and return the row count and a digest of the row digests of every
+-- non-empty range. Both projects called with the same arguments return the
+-- same range boundaries, so ranges can be compared one to one.
+CREATE OR REPLACE FUNCTION public.support_ticket_range_digest(
+  p_after_id bigint,
+  p_max_id bigint,
+  p_buckets integer
+)
+RETURNS TABLE (bucket_after bigint, bucket_max bigint, row_count bigint, digest text)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH sized AS (
+    SELECT greatest(1, ceil((p_max_id - p_after_id)::numeric / greatest(p_buckets, 1)))::bigint AS width
+  )
+  SELECT
+    p_after_id + b.bucket * sized.width,
+    least(p_after_id + (b.bucket + 1) * sized.width, p_max_id),
+    b.row_count,
+    b.digest
+  FROM sized, LATERAL (
+    SELECT
+      (t.id - p_after_id - 1) / sized.width AS bucket,
+      count(*) AS row_count,
+      md5(string_agg(t.id || ':' || public.support_ticket_row_digest(t), ',' ORDER BY t.id)) AS digest
+    FROM public.support_ticket t
+    WHERE t.id > p_after_id AND t.id <= p_max_id
+    GROUP BY 1
+  ) b
+  ORDER BY 1
+$$;
+
+-- Per-ticket digests for the ids in (p_after_id, p_max_id]
+CREATE OR REPLACE FUNCTION public.support_ticket_row_digests(
+  p_after_id bigint,
+  p_max_id bigint
+)
+RETURNS TABLE (id integer, digest text)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT t.id, public.support_ticket_row_digest(t)
+  FROM public.support_ticket t
+  WHERE t.id > p_after_id AND t.id <= p_max_id
+  ORDER BY t.id
+$$;
+
+GRANT EXECUTE ON FUNCTION public.support_ticket_row_digest(public.support_ticket) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.support_ticket_range_digest(bigint, bigint, integer) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.support_ticket_row_digests(bigint, bigint) TO anon, authenticated, service_role;